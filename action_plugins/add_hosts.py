@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: add_hosts
+short_description: Add many hosts to the in-memory inventory in one task
+description:
+    - Like add_host, but adds a whole range or list of hosts, with their groups and variables,
+      from one task instead of one loop item per host.
+    - The strategy only knows how to add one host per result, and reconciles the inventory
+      after each of them. This action only expands the hosts, they are added to the
+      inventory by the add_hosts callback in callback_plugins/, in one pass with a single
+      reconciliation. That callback does not need to be enabled, but has to be next to the
+      playbook like this action. The task fails if it is not loaded.
+    - Names are parsed like add_host's, a C(host:port) name sets C(ansible_ssh_port).
+    - Runs once, like add_host, whatever the number of hosts in the play.
+version_added: "2.8"
+options:
+    name:
+        description:
+            - Name of the hosts to add, with C({index}) replaced by each number from C(start) to C(end).
+              Other braces are left alone.
+    start:
+        description:
+            - First index.
+        default: 1
+    end:
+        description:
+            - Last index, included.
+    hosts:
+        description:
+            - Hosts to add in addition to C(name), as names or as dicts with C(name) and optionally
+              C(groups) and C(vars) of their own.
+    groups:
+        description:
+            - Groups every host is added to, as a list or comma separated.
+        aliases: [ group ]
+    vars:
+        description:
+            - Variables set on every host. In string values C({index}) and C({name}) are replaced
+              by the host's index and name.
+'''
+
+EXAMPLES = '''
+- add_hosts:
+    name: "host-{index}"
+    end: 10000
+    groups: dynamic
+    vars:
+      ansible_connection: local
+      host_id: "{index}"
+
+- add_hosts:
+    hosts:
+      - web-1
+      - name: db-1
+        groups: [db]
+        vars:
+          ansible_connection: ssh
+'''
+
+import os
+
+from ansible.errors import AnsibleActionFail
+from ansible.module_utils.six import string_types
+from ansible.parsing.utils.addresses import parse_address
+from ansible.plugins.action import ActionBase
+
+# set by callback_plugins/add_hosts.py to the pid of the controller that loaded it
+CALLBACK_ENV = 'ANSIBLE_ADD_HOSTS_CALLBACK'
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, string_types):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value)
+
+
+def host_vars(template, name, index):
+    return dict((key, value.replace('{index}', str(index)).replace('{name}', name)
+                 if isinstance(value, string_types) else value)
+                for key, value in template.items())
+
+
+def new_host(name, groups, template, index):
+    ''' [name, groups, vars] the way add_host would add it '''
+    try:
+        host_name, port = parse_address(name, allow_ranges=False)
+    except Exception:
+        # not a parsable hostname, but might still be usable
+        host_name, port = name, None
+    own_vars = host_vars(template, host_name, index)
+    if port:
+        own_vars['ansible_ssh_port'] = port
+    return [host_name, groups, own_vars]
+
+
+class ActionModule(ActionBase):
+
+    BYPASS_HOST_LOOP = True
+    TRANSFERS_FILES = False
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        # workers are forked by the controller, a leftover value from an outer run does not match
+        if os.environ.get(CALLBACK_ENV) != str(os.getppid()):
+            raise AnsibleActionFail('The add_hosts callback is not loaded in the process that started this action. '
+                                    'Put callback_plugins/add_hosts.py next to the playbook or in the configured '
+                                    'callback plugin path, and use a strategy that runs actions in workers it forks.')
+
+        args = self._task.args
+        groups = as_list(args.get('groups', args.get('group')))
+        template = args.get('vars') or {}
+        if not isinstance(template, dict):
+            raise AnsibleActionFail("vars must be a dict, got %s" % (template,))
+
+        # [name, groups, vars] per host, with the shared groups list pickled only once on the way back
+        hosts = []
+        pattern = args.get('name')
+        if pattern:
+            try:
+                start = int(args.get('start', 1))
+                end = int(args['end'])
+            except (KeyError, ValueError):
+                raise AnsibleActionFail("name needs an integer end, and start if given, got %s and %s"
+                                        % (args.get('start'), args.get('end')))
+            if '{index}' not in pattern and end > start:
+                raise AnsibleActionFail("name must contain {index} to add more than one host, got %s" % pattern)
+            for index in range(start, end + 1):
+                hosts.append(new_host(pattern.replace('{index}', str(index)), groups, template, index))
+
+        for index, host in enumerate(args.get('hosts') or []):
+            if isinstance(host, string_types):
+                host = {'name': host}
+            if not isinstance(host, dict) or not host.get('name'):
+                raise AnsibleActionFail("hosts items must be names or dicts with a name, got %s" % (host,))
+            own_groups = groups + [g for g in as_list(host.get('groups')) if g not in groups]
+            hosts.append(new_host(host['name'], own_groups, template, index))
+            hosts[-1][2].update(host.get('vars') or {})
+
+        if not hosts:
+            raise AnsibleActionFail('No hosts provided, give name and end or hosts')
+
+        result['changed'] = True
+        result['add_hosts'] = hosts
+        result['msg'] = '%d hosts to add' % len(hosts)
+        return result
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.plugins.action import ActionBase
+
+
+class ActionModule(ActionBase):
+
+    def _get_async_dir(self):
+
+        # async directory based on the shell option
+        async_dir = self.get_shell_option('async_dir', default="~/.ansible_async")
+
+        return self._remote_expand_user(async_dir)
+
+    def run(self, tmp=None, task_vars=None):
+
+        results = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_args = self._task.args.copy()
+        module_args['_async_dir'] = self._get_async_dir()
+        results.update(self._execute_module(module_name='async_wait_all', task_vars=task_vars,
+                                            module_args=module_args))
+
+        return results
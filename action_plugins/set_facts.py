@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: set_facts
+short_description: Set many host facts in a single task
+description:
+    - Controller side only, like set_fact, but sets any number of facts with one task dispatch
+      and one merge into the host's facts. Meant to be compared with setfact_50.yml and
+      setfact_bulk.yml, to tell per task overhead apart from fact merging.
+    - The facts are set as host facts, the way a facts module sets them, so they also end up
+      in the fact cache and have the precedence of gathered facts.
+version_added: "2.8"
+options:
+    facts:
+        description:
+            - Facts to set, as a dict, or a list of dicts, C(key)/C(value) items or [key, value] pairs.
+    prefix:
+        description:
+            - Generate C(count) facts named prefix0, prefix1, ... in addition to C(facts).
+    count:
+        description:
+            - Number of facts to generate.
+        default: 0
+    value:
+        description:
+            - Value of every generated fact. In string values C({index}) and C({host}) are replaced
+              by the index of the fact and the inventory hostname, so values can differ per host
+              without templating every one of them. Other braces are left alone.
+        default: "{index}"
+'''
+
+EXAMPLES = '''
+- set_facts:
+    facts:
+      x: 0
+      y: 1
+
+- set_facts:
+    prefix: x_
+    count: 10000
+    value: "{host}-{index}"
+'''
+
+from ansible.errors import AnsibleActionFail
+from ansible.module_utils.six import string_types
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import isidentifier
+
+
+class ActionModule(ActionBase):
+
+    TRANSFERS_FILES = False
+
+    def _given_facts(self, facts):
+        if isinstance(facts, dict):
+            return facts.items()
+        pairs = []
+        for item in facts:
+            if isinstance(item, dict) and set(item) == set(('key', 'value')):
+                pairs.append((item['key'], item['value']))
+            elif isinstance(item, dict):
+                pairs.extend(item.items())
+            elif isinstance(item, (list, tuple)) and len(item) == 2:
+                pairs.append(tuple(item))
+            else:
+                raise AnsibleActionFail("facts items must be dicts or [key, value] pairs, got %s" % (item,))
+        return pairs
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        facts = dict(self._given_facts(self._task.args.get('facts') or {}))
+        for key in facts:
+            if not isidentifier(key):
+                raise AnsibleActionFail("The variable name '%s' is not valid. Variables must start with a letter or underscore character, "
+                                        "and contain only letters, numbers and underscores." % key)
+
+        prefix = self._task.args.get('prefix')
+        try:
+            count = int(self._task.args.get('count', 0))
+        except ValueError:
+            raise AnsibleActionFail("count must be an integer, got %s" % self._task.args.get('count'))
+        if count:
+            if not prefix or not isidentifier(prefix + '0'):
+                raise AnsibleActionFail("prefix must be given with count and make valid variable names, got %s" % prefix)
+            value = self._task.args.get('value', '{index}')
+            if isinstance(value, string_types):
+                value = value.replace('{host}', str(task_vars.get('inventory_hostname')))
+                facts.update(('%s%d' % (prefix, index), value.replace('{index}', str(index))) for index in range(count))
+            else:
+                facts.update(('%s%d' % (prefix, index), value) for index in range(count))
+
+        if not facts:
+            raise AnsibleActionFail('No facts provided, give facts or prefix and count')
+
+        # just as _facts actions, we don't set changed=true as we are not modifying the actual host
+        result['ansible_facts'] = facts
+        return result
@@ -81,6 +81,24 @@ class BecomeModule(BecomeBase):
     fail = ('Sorry, try again.',)
     missing = ('Sorry, a password is required to run custom_plugin', 'custom_plugin: a password is required')
 
+    # invariant parts of the command, keyed on (become_exe, become_flags, become_user, has password)
+    _templates = {}
+
+    def _get_template(self, becomecmd, flags, user, has_pass):
+        key = (becomecmd, flags, user, has_pass)
+        template = self._templates.get(key)
+        if template is None:
+            if user:
+                user = '-u %s' % (user)
+            if has_pass:
+                if flags:  # this could be simplified, but kept as is for now for backwards string matching
+                    flags = flags.replace('-n', '')
+                template = (' '.join([becomecmd, flags, '-p "']), '" %s ' % (user))
+            else:
+                template = (' '.join([becomecmd, flags, '', user, '']), None)
+            self._templates[key] = template
+        return template
+
     def build_become_command(self, cmd, shell):
         super(BecomeModule, self).build_become_command(cmd, shell)
 
@@ -88,17 +106,12 @@ class BecomeModule(BecomeBase):
             return cmd
 
         becomecmd = self.get_option('become_exe') or self.name
-
         flags = self.get_option('become_flags') or ''
-        prompt = ''
-        if self.get_option('become_pass'):
-            self.prompt = '[custom_plugin via ansible, key=%s] password:' % self._id
-            if flags:  # this could be simplified, but kept as is for now for backwards string matching
-                flags = flags.replace('-n', '')
-            prompt = '-p "%s"' % (self.prompt)
-
         user = self.get_option('become_user') or ''
-        if user:
-            user = '-u %s' % (user)
+        has_pass = bool(self.get_option('become_pass'))
 
-        return ' '.join([becomecmd, flags, prompt, user, self._build_success_command(cmd, shell)])
+        head, tail = self._get_template(becomecmd, flags, user, has_pass)
+        if has_pass:
+            self.prompt = '[custom_plugin via ansible, key=%s] password:' % self._id
+            return ''.join([head, self.prompt, tail, self._build_success_command(cmd, shell)])
+        return head + self._build_success_command(cmd, shell)
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    cache: mmapfile
+    short_description: Facts of all hosts in one append-only, memory mapped file
+    description:
+        - Keeps the facts of every host as a JSON record in one append-only file, C(facts.mmap) or
+          C(<prefix>.mmap) in the cache directory, instead of one file per host like jsonfile.
+        - Opening the cache only reads the record headers, to build an index of where each host's
+          facts are. The facts of a host are decoded from the memory mapped file the first time they
+          are read, so a play that uses a few hosts does not parse the facts of all of them.
+        - Deleting the facts of a host, as meta clear_facts does, appends a tombstone. Once replaced
+          and deleted records take more than compact_ratio of the file, the live records are copied
+          to a new file which replaces it.
+        - Writers append under a lock on C(<file>.lock), and readers index what other processes
+          appended, so several ansible-playbook runs can share the cache.
+    version_added: "2.8"
+    options:
+      _uri:
+        required: True
+        description:
+          - Path in which the cache plugin will save the file
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_CONNECTION
+        ini:
+          - key: fact_caching_connection
+            section: defaults
+        type: path
+      _prefix:
+        description: User defined name of the file, without the .mmap extension
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_PREFIX
+        ini:
+          - key: fact_caching_prefix
+            section: defaults
+      _timeout:
+        default: 86400
+        description: Expiration timeout for the cache plugin data
+        env:
+          - name: ANSIBLE_CACHE_PLUGIN_TIMEOUT
+        ini:
+          - key: fact_caching_timeout
+            section: defaults
+        type: integer
+      compact_ratio:
+        default: 0.5
+        description: Fraction of the file taken by replaced and deleted records above which it is compacted.
+        env:
+          - name: ANSIBLE_CACHE_MMAPFILE_COMPACT_RATIO
+        ini:
+          - key: compact_ratio
+            section: cache_mmapfile
+        type: float
+'''
+
+from contextlib import contextmanager
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.parsing.ajson import AnsibleJSONEncoder, AnsibleJSONDecoder
+from ansible.plugins.cache import BaseCacheModule
+from ansible.utils.display import Display
+
+display = Display()
+
+# magic, kind, key length, value length, time written; followed by the key and the JSON value
+HEADER = struct.Struct('<2sBHId')
+MAGIC = b'FC'
+SET = 1
+TOMBSTONE = 0
+# smaller files are never compacted
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+class CacheModule(BaseCacheModule):
+    """
+    A caching module backed by one append-only, memory mapped file.
+    """
+
+    def __init__(self, *args, **kwargs):
+        try:
+            super(CacheModule, self).__init__(*args, **kwargs)
+            cache_dir = self.get_option('_uri')
+            prefix = self.get_option('_prefix')
+            self._timeout = float(self.get_option('_timeout'))
+            self._compact_ratio = float(self.get_option('compact_ratio'))
+        except KeyError:
+            cache_dir = C.CACHE_PLUGIN_CONNECTION
+            prefix = C.CACHE_PLUGIN_PREFIX
+            self._timeout = float(C.CACHE_PLUGIN_TIMEOUT)
+            self._compact_ratio = 0.5
+
+        if not cache_dir:
+            raise AnsibleError("error, 'mmapfile' cache plugin requires the 'fact_caching_connection' config option "
+                               "to be set (to a writeable directory path)")
+        cache_dir = os.path.expanduser(os.path.expandvars(cache_dir))
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except (OSError, IOError) as e:
+                raise AnsibleError("error in 'mmapfile' cache plugin while trying to create cache dir %s : %s"
+                                   % (cache_dir, to_text(e)))
+        self._path = os.path.join(cache_dir, '%s.mmap' % (prefix or 'facts'))
+
+        self._cache = {}  # key -> decoded facts
+        self._index = {}  # key -> (record offset, record length, value offset, time written)
+        self._end = 0  # end of the last complete record indexed
+        self._dead = 0  # bytes of replaced records and tombstones
+        self._pid = None
+        self._fd = None
+        self._lock = None
+        self._ino = None
+        self._map = None
+        self._mapped = 0
+
+    def __getstate__(self):
+        ''' file descriptors and maps are opened again by the process that unpickles it '''
+        return dict(self.__dict__, _pid=None, _fd=None, _lock=None, _map=None, _mapped=0)
+
+    def _refresh(self):
+        ''' open the file in this process, follow compactions and index what others appended '''
+        if self._pid != os.getpid():
+            # first use in this process, or in a fork: locks must not be shared with the parent
+            if self._lock is not None:
+                os.close(self._lock)
+            self._pid = os.getpid()
+            self._lock = os.open(self._path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            self._open()
+            return
+        try:
+            st = os.stat(self._path)
+            ino, size = st.st_ino, st.st_size
+        except OSError:
+            ino, size = None, 0
+        if ino != self._ino:
+            # compacted or removed by another process
+            self._cache = {}
+            self._open()
+        elif size != self._end:
+            self._scan()
+
+    def _open(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self._path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._ino = os.fstat(self._fd).st_ino
+        self._index = {}
+        self._end = 0
+        self._dead = 0
+        self._scan()
+
+    def _scan(self):
+        ''' index the records between the last one indexed and the end of the file '''
+        if self._map is not None:
+            self._map.close()
+        self._mapped = os.fstat(self._fd).st_size
+        self._map = mmap.mmap(self._fd, self._mapped, access=mmap.ACCESS_READ) if self._mapped else None
+
+        offset = self._end
+        while offset + HEADER.size <= self._mapped:
+            magic, kind, key_length, value_length, written = HEADER.unpack_from(self._map, offset)
+            length = HEADER.size + key_length + value_length
+            if magic != MAGIC:
+                display.warning("'mmapfile' cache %s is corrupt at byte %d, ignoring the rest of it"
+                                % (self._path, offset))
+                break
+            if offset + length > self._mapped:
+                # still being written, or torn by a crash and truncated by the next writer
+                break
+            key = to_text(self._map[offset + HEADER.size:offset + HEADER.size + key_length],
+                          errors='surrogate_or_strict')
+            self._cache.pop(key, None)
+            self._add(key, kind, offset, length, offset + HEADER.size + key_length, written)
+            offset += length
+        self._end = offset
+
+    def _add(self, key, kind, offset, length, value_offset, written):
+        old = self._index.pop(key, None)
+        if old is not None:
+            self._dead += old[1]
+        if kind == SET:
+            self._index[key] = (offset, length, value_offset, written)
+        else:
+            self._dead += length
+
+    @contextmanager
+    def _locked(self):
+        self._refresh()
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+        try:
+            self._refresh()
+            yield
+        finally:
+            fcntl.flock(self._lock, fcntl.LOCK_UN)
+
+    def _append(self, key, kind, b_value=b''):
+        ''' append one record, with the lock held and the index up to date '''
+        b_key = to_bytes(key, errors='surrogate_or_strict')
+        written = time.time()
+        record = HEADER.pack(MAGIC, kind, len(b_key), len(b_value), written) + b_key + b_value
+        if self._mapped > self._end:
+            # nobody else is writing, so this is a record torn by a crash
+            os.ftruncate(self._fd, self._end)
+        view = memoryview(record)
+        done = 0
+        while done < len(record):
+            done += os.write(self._fd, view[done:])
+        self._add(key, kind, self._end, len(record), self._end + HEADER.size + len(b_key), written)
+        self._end += len(record)
+        if not self._index:
+            self._rewrite([])
+        elif self._end >= COMPACT_MIN_BYTES and self._dead > self._end * self._compact_ratio:
+            self._compact()
+
+    def _compact(self):
+        ''' copy the live records in file order to a new file and swap it in, with the lock held '''
+        self._scan()  # maps what this process appended
+        live = sorted(entry for key, entry in self._index.items() if not self._expired(entry[3]))
+        self._rewrite(live)
+
+    def _rewrite(self, entries):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self._path), prefix='.' + os.path.basename(self._path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for offset, length, value_offset, written in entries:
+                    f.write(self._map[offset:offset + length])
+            os.chmod(tmp, 0o644)
+            os.rename(tmp, self._path)
+        except (OSError, IOError) as e:
+            os.unlink(tmp)
+            raise AnsibleError("error in 'mmapfile' cache plugin while trying to rewrite %s : %s"
+                               % (self._path, to_text(e)))
+        cache = self._cache
+        self._open()
+        self._cache = dict((key, value) for key, value in cache.items() if key in self._index)
+        display.vvvv("'mmapfile' cache %s rewritten with %d hosts" % (self._path, len(self._index)))
+
+    def _expired(self, written):
+        return self._timeout > 0 and time.time() - written > self._timeout
+
+    def get(self, key):
+        """ Like jsonfile, facts stay in memory once read, so they do not expire in the middle of a play """
+
+        if key not in self._cache:
+            self._refresh()
+            entry = self._index.get(key)
+            if entry is None or self._expired(entry[3]) or key == "":
+                raise KeyError
+            offset, length, value_offset, written = entry
+            if offset + length > self._mapped:
+                self._scan()  # maps what this process appended
+            try:
+                self._cache[key] = json.loads(to_text(self._map[value_offset:offset + length]), cls=AnsibleJSONDecoder)
+            except ValueError as e:
+                display.warning("error in 'mmapfile' cache plugin while trying to read the facts of %s from %s : %s. "
+                                "Most likely corrupt, so erasing them and failing." % (key, self._path, to_text(e)))
+                self.delete(key)
+                raise AnsibleError("The cached facts of %s in %s were corrupt. They have been removed, "
+                                   "so you can re-run your command now." % (key, self._path))
+
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        b_value = to_bytes(json.dumps(value, cls=AnsibleJSONEncoder, sort_keys=True, separators=(',', ':')))
+        with self._locked():
+            self._append(key, SET, b_value)
+        self._cache[key] = value
+
+    def keys(self):
+        self._refresh()
+        return [key for key, entry in self._index.items() if not self._expired(entry[3])]
+
+    def contains(self, key):
+        if key in self._cache:
+            return True
+        self._refresh()
+        entry = self._index.get(key)
+        return entry is not None and not self._expired(entry[3])
+
+    def delete(self, key):
+        self._cache.pop(key, None)
+        with self._locked():
+            if key in self._index:
+                self._append(key, TOMBSTONE)
+
+    def flush(self):
+        with self._locked():
+            self._rewrite([])
+        self._cache = {}
+
+    def copy(self):
+        ret = dict()
+        for key in self.keys():
+            ret[key] = self.get(key)
+        return ret
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: add_hosts
+    type: aggregate
+    short_description: Adds the hosts returned by the add_hosts action to the inventory
+    version_added: "2.8"
+    description:
+        - Companion of action_plugins/add_hosts.py. Actions run in worker processes and cannot
+          change the inventory, and the strategy only adds one host per result, reconciling the
+          whole inventory each time.
+        - This callback runs in the controller process and adds all hosts of an add_hosts result
+          to the inventory of the running play, then reconciles it once.
+        - Every host goes through the same steps as add_host's in InventoryManager.add_dynamic_host.
+          Then add_dynamic_host itself is called for it, which finds nothing left to change and only
+          remembers the host for meta refresh_inventory.
+        - It is always loaded, and ignores every result without add_hosts. The action fails when it is not.
+'''
+
+import os
+
+from ansible.plugins.callback import CallbackBase
+from ansible.utils.vars import combine_vars
+
+# read by action_plugins/add_hosts.py in the workers, which are forked from this process
+CALLBACK_ENV = 'ANSIBLE_ADD_HOSTS_CALLBACK'
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'add_hosts'
+    CALLBACK_NEEDS_WHITELIST = False
+    CALLBACK_NEEDS_ENABLED = False
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._inventory = None
+        os.environ[CALLBACK_ENV] = str(os.getpid())
+
+    def v2_playbook_on_play_start(self, play):
+        self._inventory = play.get_variable_manager()._inventory
+
+    def v2_runner_on_ok(self, result):
+        # found by the result key rather than the action name, which can be any alias or FQCN
+        items = result._result.get('results', []) if result._task.loop else [result._result]
+        hosts = [host for item in items for host in item.get('add_hosts', [])]
+        if not hosts:
+            return
+        if self._inventory is None:
+            self._display.warning('add_hosts: no play has started, so %d hosts were not added' % len(hosts))
+            return
+        self._add_hosts(hosts)
+
+    def _add_hosts(self, hosts):
+        ''' the steps of InventoryManager.add_dynamic_host for every host, with one reconciliation at the end '''
+        inventory = self._inventory
+        added = 0
+        changed = False
+        for name, groups, host_vars in hosts:
+            if name not in inventory.hosts:
+                inventory.add_host(name, 'all')
+                added += 1
+                changed = True
+            host = inventory.hosts[name]
+            current = host.get_vars()
+            combined = combine_vars(current, host_vars)
+            if combined != current:
+                host.vars = combined
+                changed = True
+            for group_name in groups:
+                if group_name not in inventory.groups:
+                    group_name = inventory.add_group(group_name)
+                    changed = True
+                if inventory.groups[group_name].add_host(host):
+                    changed = True
+        if changed:
+            inventory.reconcile_inventory()
+        # now that every host is in place this changes nothing and does not reconcile again, it only
+        # records the host for meta: refresh_inventory, as the strategy does for add_host
+        for name, groups, host_vars in hosts:
+            inventory.add_dynamic_host({'host_name': name, 'groups': groups, 'host_vars': host_vars}, {})
+        self._display.vv('add_hosts: %d of %d hosts were new' % (added, len(hosts)))
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: event_sink
+    type: aggregate
+    short_description: Writes every playbook event to a local file in batches and reports event throughput
+    version_added: "2.8"
+    description:
+        - Buffers playbook and runner events in memory and serializes them a batch at a time,
+          either as JSON lines or as length-prefixed JSON records, through a single buffered writer.
+        - At the end of the playbook it reports events per second and the time spent serializing
+          and writing, to tell controller side event overhead apart from the rest of the run.
+    requirements:
+      - enable in configuration, e.g. ANSIBLE_CALLBACKS_ENABLED=event_sink
+    options:
+      path:
+        description: File the events are written to.
+        default: ansible_events.jsonl
+        env:
+          - name: ANSIBLE_EVENT_SINK_PATH
+        ini:
+          - section: callback_event_sink
+            key: path
+      format:
+        description: C(jsonl) for one JSON document per line, C(length_prefixed) for a 4 byte big endian length before each one.
+        default: jsonl
+        choices: ['jsonl', 'length_prefixed']
+        env:
+          - name: ANSIBLE_EVENT_SINK_FORMAT
+        ini:
+          - section: callback_event_sink
+            key: format
+      batch_size:
+        description: Number of events buffered before they are serialized and written.
+        type: int
+        default: 1000
+        env:
+          - name: ANSIBLE_EVENT_SINK_BATCH_SIZE
+        ini:
+          - section: callback_event_sink
+            key: batch_size
+      buffer_bytes:
+        description: Size of the file writer's buffer.
+        type: int
+        default: 1048576
+        env:
+          - name: ANSIBLE_EVENT_SINK_BUFFER_BYTES
+        ini:
+          - section: callback_event_sink
+            key: buffer_bytes
+'''
+
+import struct
+import time
+
+from ansible.parsing.ajson import AnsibleJSONEncoder
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'event_sink'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._writer = None
+        self._batch_size = 1
+        self._length_prefixed = False
+        self._batch = []
+        self._counter = 0
+        self._bytes = 0
+        self._serialize_time = 0.0
+        self._write_time = 0.0
+        self._start = time.time()
+        self._encoder = AnsibleJSONEncoder(separators=(',', ':'))
+
+    def _open(self):
+        ''' options are set after __init__, so the file is opened by the first event '''
+        self._batch_size = max(self.get_option('batch_size'), 1)
+        self._length_prefixed = self.get_option('format') == 'length_prefixed'
+        self._writer = open(self.get_option('path'), 'wb', self.get_option('buffer_bytes'))
+
+    def _event(self, event, **data):
+        if self._writer is None:
+            self._open()
+        self._counter += 1
+        data.update(event=event, counter=self._counter, created=time.time())
+        self._batch.append(data)
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def _runner_event(self, event, result, **data):
+        self._event(event, host=result._host.get_name(), task=result._task.get_name(),
+                    task_uuid=result._task._uuid, res=result._result, **data)
+
+    def _flush(self):
+        if not self._batch:
+            return
+        start = time.time()
+        encode = self._encoder.encode
+        if self._length_prefixed:
+            records = [encode(event).encode('utf-8') for event in self._batch]
+            chunk = b''.join(struct.pack('>I', len(record)) + record for record in records)
+        else:
+            chunk = '\n'.join(encode(event) for event in self._batch).encode('utf-8') + b'\n'
+        written = time.time()
+        self._writer.write(chunk)
+        self._serialize_time += written - start
+        self._write_time += time.time() - written
+        self._bytes += len(chunk)
+        self._batch = []
+
+    def v2_playbook_on_start(self, playbook):
+        self._start = time.time()
+        self._event('playbook_on_start', playbook=playbook._file_name)
+
+    def v2_playbook_on_play_start(self, play):
+        self._event('playbook_on_play_start', play=play.get_name(), play_uuid=play._uuid)
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._event('playbook_on_task_start', task=task.get_name(), task_uuid=task._uuid)
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self._event('playbook_on_handler_task_start', task=task.get_name(), task_uuid=task._uuid)
+
+    def v2_runner_on_start(self, host, task):
+        self._event('runner_on_start', host=host.get_name(), task=task.get_name(), task_uuid=task._uuid)
+
+    def v2_runner_on_ok(self, result):
+        self._runner_event('runner_on_ok', result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._runner_event('runner_on_failed', result, ignore_errors=ignore_errors)
+
+    def v2_runner_on_skipped(self, result):
+        self._runner_event('runner_on_skipped', result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._runner_event('runner_on_unreachable', result)
+
+    def v2_runner_item_on_ok(self, result):
+        self._runner_event('runner_item_on_ok', result)
+
+    def v2_runner_item_on_failed(self, result):
+        self._runner_event('runner_item_on_failed', result)
+
+    def v2_runner_item_on_skipped(self, result):
+        self._runner_event('runner_item_on_skipped', result)
+
+    def v2_playbook_on_stats(self, stats):
+        self._event('playbook_on_stats', stats=dict((host, stats.summarize(host)) for host in stats.processed))
+        self._flush()
+        start = time.time()
+        self._writer.close()
+        self._write_time += time.time() - start
+
+        elapsed = time.time() - self._start
+        self._display.banner('EVENT SINK')
+        self._display.display('{0} events, {1:.0f} events/s, {2} bytes in {3:.3f}s'.format(
+            self._counter, self._counter / elapsed if elapsed else 0, self._bytes, elapsed))
+        self._display.display('serialization {0:.3f}s, writes {1:.3f}s, {2:.1%} of the run'.format(
+            self._serialize_time, self._write_time, (self._serialize_time + self._write_time) / elapsed if elapsed else 0))
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: task_profile
+    type: aggregate
+    short_description: Profiles CPU and memory of every task with cProfile and tracemalloc
+    version_added: "2.8"
+    description:
+        - Runs cProfile, and optionally tracemalloc, around every task, on both sides of the controller.
+          In the controller process it profiles from one task start to the next, which covers variable
+          management, queuing and result processing. In the forked worker processes it profiles the
+          task executor, which is where task arguments, loops and conditionals are templated.
+        - Workers write their samples to a spool directory, and at the end of the playbook everything
+          is aggregated by task name into pstats files and one text report with the top functions
+          and allocation sites of every task, in a directory of their own for every run.
+        - The task executor is only patched while the playbook runs, and not at all when the sample
+          rate is 0.
+        - With a sample rate below 1 only that fraction of tasks is profiled, on the controller and
+          for every host, which bounds the overhead on long runs. Tracing allocations is the most
+          expensive part.
+    requirements:
+      - enable in configuration, e.g. ANSIBLE_CALLBACKS_ENABLED=task_profile
+    options:
+      output_dir:
+        description: Directory that gets a timestamped directory with the pstats files and task_profile.txt of every run.
+        default: task_profile
+        env:
+          - name: ANSIBLE_TASK_PROFILE_DIR
+        ini:
+          - section: callback_task_profile
+            key: output_dir
+      sample_rate:
+        description: Fraction of tasks that are profiled.
+        type: float
+        default: 1.0
+        env:
+          - name: ANSIBLE_TASK_PROFILE_SAMPLE_RATE
+        ini:
+          - section: callback_task_profile
+            key: sample_rate
+      memory:
+        description: Also trace allocations with tracemalloc in the workers.
+        type: bool
+        default: True
+        env:
+          - name: ANSIBLE_TASK_PROFILE_MEMORY
+        ini:
+          - section: callback_task_profile
+            key: memory
+      top:
+        description: Number of functions and allocation sites listed per task in the report.
+        type: int
+        default: 15
+        env:
+          - name: ANSIBLE_TASK_PROFILE_TOP
+        ini:
+          - section: callback_task_profile
+            key: top
+'''
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import shutil
+import time
+import tracemalloc
+import zlib
+
+from ansible.executor.task_executor import TaskExecutor
+from ansible.plugins.callback import CallbackBase
+
+
+def sampled(key, rate):
+    ''' the same decision for the same key in every process '''
+    return rate >= 1 or zlib.crc32(key.encode('utf-8')) < rate * 0x100000000
+
+
+def profiled_run(run, spool, rate, memory, top):
+    ''' TaskExecutor.run, profiled when the task is sampled '''
+
+    def wrapper(self):
+        # sampled on the task alone, like the controller side, so both profile the same tasks
+        if not sampled(self._task._uuid, rate):
+            return run(self)
+        key = '%s:%s' % (self._task._uuid, self._host.name)
+        profiler = cProfile.Profile()
+        if memory:
+            tracemalloc.start()
+        profiler.enable()
+        try:
+            return run(self)
+        finally:
+            profiler.disable()
+            path = os.path.join(spool, '%s.%d' % (re.sub(r'[^\w.-]', '_', key), os.getpid()))
+            profiler.dump_stats(path + '.pstats')
+            allocations, peak = [], 0
+            if memory:
+                # leave out what the profilers allocate themselves
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, name) for name in (cProfile.__file__, tracemalloc.__file__, __file__)])
+                allocations = [[str(stat.traceback), stat.size, stat.count]
+                               for stat in snapshot.statistics('lineno')[:top]]
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            with open(path + '.json', 'w') as f:
+                json.dump({'task': self._task._uuid, 'allocations': allocations, 'peak': peak}, f)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'task_profile'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._names = {}  # task uuid -> name
+        self._order = []  # task names in the order they first ran
+        self._controller = {}  # task name -> pstats.Stats
+        self._profiler = None
+        self._current = None
+        self._spool = None
+        self._original_run = None
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        self._output_dir = self.get_option('output_dir')
+        self._rate = self.get_option('sample_rate')
+        self._top = self.get_option('top')
+        if self._rate > 0 and self._spool is None and not getattr(TaskExecutor.run, 'profiled', False):
+            # patched before the workers are forked, so every worker inherits it
+            self._spool = os.path.join(self._output_dir, '.spool-%d' % os.getpid())
+            if not os.path.isdir(self._spool):
+                os.makedirs(self._spool)
+            self._original_run = TaskExecutor.run
+            TaskExecutor.run = profiled_run(TaskExecutor.run, self._spool, self._rate, self.get_option('memory'),
+                                            self._top)
+
+    def _stop(self):
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        stats = pstats.Stats(self._profiler)
+        if self._current in self._controller:
+            self._controller[self._current].add(stats)
+        else:
+            self._controller[self._current] = stats
+        self._profiler = None
+
+    def _start(self, task):
+        self._stop()
+        name = task.get_name()
+        self._names[task._uuid] = name
+        if name not in self._order:
+            self._order.append(name)
+        if sampled(task._uuid, self._rate):
+            self._current = name
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._start(task)
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self._start(task)
+
+    def v2_playbook_on_stats(self, stats):
+        self._stop()
+        if self._original_run is not None:
+            TaskExecutor.run = self._original_run
+            self._original_run = None
+        workers, allocations, samples, peaks = self._read_spool()
+
+        # a directory per run, so reports of earlier runs are neither mixed in nor overwritten
+        output_dir = os.path.join(self._output_dir, '%s-%d' % (time.strftime('%Y%m%d-%H%M%S'), os.getpid()))
+        os.makedirs(output_dir)
+        report = []
+        totals = []
+        for index, name in enumerate(self._order):
+            slug = '%03d-%s' % (index, re.sub(r'[^\w.-]+', '_', name).strip('_')[:60])
+            report.append('=' * 78)
+            report.append('TASK %s: %s samples, peak traced memory %d bytes' % (name, samples.get(name, 0),
+                                                                             peaks.get(name, 0)))
+            for side, profiles in (('controller', self._controller), ('workers', workers)):
+                if name not in profiles:
+                    continue
+                profile = profiles[name]
+                profile.dump_stats(os.path.join(output_dir, '%s.%s.pstats' % (slug, side)))
+                report.append('--- %s, %.3fs' % (side, profile.total_tt))
+                report.append(self._top_functions(profile))
+            if name in workers:
+                totals.append((workers[name].total_tt, name))
+            if allocations.get(name):
+                report.append('--- top allocation sites (bytes still allocated at the end of the task, count)')
+                for where, (size, count) in sorted(allocations[name].items(), key=lambda item: -item[1][0])[:self._top]:
+                    report.append('%12d %8d  %s' % (size, count, where))
+        with open(os.path.join(output_dir, 'task_profile.txt'), 'w') as f:
+            f.write('\n'.join(report) + '\n')
+        if self._spool:
+            shutil.rmtree(self._spool, ignore_errors=True)
+
+        self._display.banner('TASK PROFILE')
+        for total, name in sorted(totals, reverse=True)[:self._top]:
+            self._display.display('%10.3fs in workers  %s' % (total, name))
+        self._display.display('pstats files and task_profile.txt written to %s' % output_dir)
+
+    def _read_spool(self):
+        ''' worker samples, merged by task name '''
+        workers, allocations, samples, peaks = {}, {}, {}, {}
+        if not self._spool or not os.path.isdir(self._spool):
+            return workers, allocations, samples, peaks
+        for entry in sorted(os.listdir(self._spool)):
+            if not entry.endswith('.json'):
+                continue
+            path = os.path.join(self._spool, entry[:-len('.json')])
+            with open(path + '.json') as f:
+                sample = json.load(f)
+            name = self._names.get(sample['task'], sample['task'])
+            if name in workers:
+                workers[name].add(path + '.pstats')
+            else:
+                workers[name] = pstats.Stats(path + '.pstats')
+            samples[name] = samples.get(name, 0) + 1
+            peaks[name] = max(peaks.get(name, 0), sample['peak'])
+            sites = allocations.setdefault(name, {})
+            for where, size, count in sample['allocations']:
+                total = sites.get(where, (0, 0))
+                sites[where] = (total[0] + size, total[1] + count)
+        return workers, allocations, samples, peaks
+
+    def _top_functions(self, profile):
+        lines = []
+        profile.sort_stats('cumulative')
+        for func in profile.fcn_list[:self._top]:
+            calls, primitive, tottime, cumtime, callers = profile.stats[func]
+            lines.append('%10.3fs cum %10.3fs own %9d calls  %s' % (cumtime, tottime, calls, pstats.func_std_string(func)))
+        return '\n'.join(lines)
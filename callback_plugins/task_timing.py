@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: task_timing
+    type: aggregate
+    short_description: Records per task, per host timings and summarizes them at the end of the playbook
+    version_added: "2.8"
+    description:
+        - Keeps the start and end time of every (play, task, host) in preallocated in-memory arrays,
+          and does no I/O until the playbook ends.
+        - At the end it reports the slowest tasks, p50/p95/p99 durations per task, the slowest hosts
+          with their critical path through the playbook, and how long forks sat idle.
+        - Failures handled by the rescue section of a block are counted as rescued, not failed.
+        - Fork time only counts the forks that could be busy, at most the number of hosts that ran
+          tasks in each play or serial batch.
+    requirements:
+      - enable in configuration, e.g. ANSIBLE_CALLBACKS_ENABLED=task_timing
+    options:
+      output_path:
+        description: Write the summary as JSON to this file.
+        env:
+          - name: ANSIBLE_TASK_TIMING_OUTPUT
+        ini:
+          - section: callback_task_timing
+            key: output_path
+      buffer_size:
+        description: Number of (task, host) timings kept, older ones are overwritten once it is full.
+        type: int
+        default: 1048576
+        env:
+          - name: ANSIBLE_TASK_TIMING_BUFFER_SIZE
+        ini:
+          - section: callback_task_timing
+            key: buffer_size
+      top:
+        description: Number of tasks and hosts listed in the summary.
+        type: int
+        default: 10
+        env:
+          - name: ANSIBLE_TASK_TIMING_TOP
+        ini:
+          - section: callback_task_timing
+            key: top
+'''
+
+from array import array
+import json
+import time
+
+from ansible import context
+from ansible.playbook.block import Block
+from ansible.plugins.callback import CallbackBase
+
+STATUSES = ('ok', 'changed', 'failed', 'ignored', 'skipped', 'unreachable', 'rescued')
+OK, CHANGED, FAILED, IGNORED, SKIPPED, UNREACHABLE, RESCUED = range(len(STATUSES))
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def rescued(task):
+    ''' whether a failure of task is handled by the rescue section of an enclosing block '''
+    child, parent = task, task._parent
+    while parent is not None:
+        if isinstance(parent, Block) and parent.rescue and any(item._uuid == child._uuid for item in parent.block):
+            return True
+        child, parent = parent, parent._parent
+    return False
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'task_timing'
+    CALLBACK_NEEDS_WHITELIST = True
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._size = None
+        self._count = 0
+        self._play = None
+        self._tasks = []  # (play name, task name) per task index
+        self._task_index = {}
+        self._hosts = []
+        self._host_index = {}
+        self._running = {}
+        self._batches = []  # [start, ids of the hosts that ran tasks] per play or serial batch
+        self._playbook_start = time.time()
+
+    def _allocate(self):
+        self._size = max(self.get_option('buffer_size'), 1)
+        self._task_ids = array('i', [0]) * self._size
+        self._host_ids = array('i', [0]) * self._size
+        self._statuses = array('b', [0]) * self._size
+        self._starts = array('d', [0.0]) * self._size
+        self._ends = array('d', [0.0]) * self._size
+
+    def _task_id(self, task):
+        task_id = self._task_index.get(task._uuid)
+        if task_id is None:
+            task_id = self._task_index[task._uuid] = len(self._tasks)
+            self._tasks.append((self._play, task.get_name()))
+        return task_id
+
+    def _host_id(self, name):
+        host_id = self._host_index.get(name)
+        if host_id is None:
+            host_id = self._host_index[name] = len(self._hosts)
+            self._hosts.append(name)
+        return host_id
+
+    def _record(self, result, status):
+        end = time.time()
+        task_id = self._task_id(result._task)
+        host_id = self._host_id(result._host.get_name())
+        start = self._running.pop((host_id, task_id), end)
+        if self._batches:
+            self._batches[-1][1].add(host_id)
+        if self._size is None:
+            self._allocate()
+        slot = self._count % self._size
+        self._task_ids[slot] = task_id
+        self._host_ids[slot] = host_id
+        self._statuses[slot] = status
+        self._starts[slot] = start
+        self._ends[slot] = end
+        self._count += 1
+
+    def v2_playbook_on_start(self, playbook):
+        self._playbook_start = time.time()
+
+    def v2_playbook_on_play_start(self, play):
+        # called again for every serial batch
+        self._play = play.get_name()
+        self._batches.append([time.time(), set()])
+
+    def v2_runner_on_start(self, host, task):
+        self._running[(self._host_id(host.get_name()), self._task_id(task))] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result, CHANGED if result._result.get('changed', False) else OK)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        if ignore_errors:
+            self._record(result, IGNORED)
+        else:
+            self._record(result, RESCUED if rescued(result._task) else FAILED)
+
+    def v2_runner_on_skipped(self, result):
+        self._record(result, SKIPPED)
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result, UNREACHABLE)
+
+    def v2_playbook_on_stats(self, stats):
+        wall_time = time.time() - self._playbook_start
+        summary = self._summarize(stats, wall_time)
+        if self.get_option('output_path'):
+            with open(self.get_option('output_path'), 'w') as f:
+                json.dump(summary, f, indent=1)
+
+        self._display.banner('TASK TIMING')
+        for task in summary['slowest_tasks']:
+            self._display.display('{max:>10.3f}s max {p95:>10.3f}s p95  {play}: {task}'.format(**task))
+        self._display.display('fork idle time {0:.3f}s of {1:.3f}s, {2} timings dropped'.format(
+            summary['fork_idle_time'], summary['fork_time'], summary['dropped']))
+
+    def _summarize(self, stats, wall_time):
+        kept = min(self._count, self._size or 0)
+        durations = [[] for task in self._tasks]
+        host_paths = [[] for host in self._hosts]
+        status_counts = [[0] * len(STATUSES) for task in self._tasks]
+        busy = 0.0
+        for slot in range(kept):
+            task_id = self._task_ids[slot]
+            duration = self._ends[slot] - self._starts[slot]
+            durations[task_id].append(duration)
+            host_paths[self._host_ids[slot]].append((self._starts[slot], duration, task_id))
+            status_counts[task_id][self._statuses[slot]] += 1
+            busy += duration
+
+        tasks = []
+        for task_id, task_durations in enumerate(durations):
+            if not task_durations:
+                continue
+            task_durations.sort()
+            play, name = self._tasks[task_id]
+            tasks.append({'play': play, 'task': name, 'hosts': len(task_durations), 'total': sum(task_durations),
+                          'max': task_durations[-1], 'p50': percentile(task_durations, 0.50),
+                          'p95': percentile(task_durations, 0.95), 'p99': percentile(task_durations, 0.99),
+                          'statuses': dict((status, count) for status, count
+                                           in zip(STATUSES, status_counts[task_id]) if count)})
+
+        hosts = []
+        for host_id, path in enumerate(host_paths):
+            if not path:
+                continue
+            path.sort()
+            slowest = max(path, key=lambda step: step[1])
+            name = self._hosts[host_id]
+            hosts.append({'host': name, 'busy': sum(step[1] for step in path), 'tasks': len(path),
+                          'span': path[-1][0] + path[-1][1] - path[0][0], 'slowest_task': self._tasks[slowest[2]][1],
+                          'rescued': stats.rescued.get(name, 0)})
+
+        top = self.get_option('top')
+        forks = context.CLIARGS.get('forks') or 1
+        # forks beyond the hosts of a batch never had anything to run
+        end = self._playbook_start + wall_time
+        fork_time = 0.0
+        for (start, batch_hosts), following in zip(self._batches, self._batches[1:] + [[end]]):
+            fork_time += min(forks, len(batch_hosts)) * (following[0] - start)
+        return {'wall_time': wall_time, 'forks': forks, 'fork_time': fork_time,
+                'fork_idle_time': max(fork_time - busy, 0.0), 'timings': kept,
+                'dropped': self._count - kept,
+                'slowest_tasks': sorted(tasks, key=lambda task: task['max'], reverse=True)[:top],
+                'critical_path': sorted(hosts, key=lambda host: host['busy'], reverse=True)[:top],
+                'tasks': tasks}
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    connection: simulated
+    short_description: execute on controller, with simulated network latency, bandwidth and unreachability
+    description:
+        - Runs everything locally like the local connection, but first sleeps the way a remote host
+          would keep a task waiting, so forks, strategies and serial batches can be tried against
+          many "remote" hosts on one machine.
+        - Every connect, command and file transfer waits one round trip drawn from the latency
+          distribution, and file transfers also wait for their size over the bandwidth.
+        - Latencies are seeded per host and task, so they vary between hosts and over time, and a run
+          with the same seed and playbook sees the same ones again. Whether a host is unreachable is
+          seeded per host only, so it stays the same in every task.
+    version_added: "2.8"
+    extends_documentation_fragment:
+        - connection_pipelining
+    options:
+      latency_distribution:
+        description: Distribution of round trip times.
+        default: constant
+        choices: ['constant', 'uniform', 'normal', 'lognormal', 'exponential']
+        vars:
+          - name: ansible_simulated_latency_distribution
+        env:
+          - name: ANSIBLE_SIMULATED_LATENCY_DISTRIBUTION
+      latency:
+        description: Mean round trip time in seconds.
+        type: float
+        default: 0.05
+        vars:
+          - name: ansible_simulated_latency
+        env:
+          - name: ANSIBLE_SIMULATED_LATENCY
+      jitter:
+        description:
+          - Spread of the round trip time in seconds, the standard deviation for normal and lognormal,
+            half the width for uniform. Ignored by constant and exponential.
+        type: float
+        default: 0.0
+        vars:
+          - name: ansible_simulated_jitter
+        env:
+          - name: ANSIBLE_SIMULATED_JITTER
+      bandwidth:
+        description: Bytes per second for put_file and fetch_file, 0 for no limit.
+        type: int
+        default: 0
+        vars:
+          - name: ansible_simulated_bandwidth
+        env:
+          - name: ANSIBLE_SIMULATED_BANDWIDTH
+      unreachable_probability:
+        description: Probability that a host cannot be connected to.
+        type: float
+        default: 0.0
+        vars:
+          - name: ansible_simulated_unreachable_probability
+        env:
+          - name: ANSIBLE_SIMULATED_UNREACHABLE_PROBABILITY
+      seed:
+        description: Seed of the per host draws.
+        type: int
+        default: 0
+        vars:
+          - name: ansible_simulated_seed
+        env:
+          - name: ANSIBLE_SIMULATED_SEED
+'''
+
+import math
+import os
+import random
+import time
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.connection.local import Connection as LocalConnection
+
+
+class Connection(LocalConnection):
+    ''' Local connections that behave like remote ones '''
+
+    transport = 'simulated'
+
+    def __init__(self, *args, **kwargs):
+        super(Connection, self).__init__(*args, **kwargs)
+        # a connection is made for every task, the executor passes the task's uuid
+        self._task_uuid = kwargs.get('task_uuid')
+        self._rng = None
+
+    def _random(self):
+        if self._rng is None:
+            self._rng = random.Random('{0}:{1}:{2}'.format(self.get_option('seed'), self._play_context.remote_addr,
+                                                           self._task_uuid))
+        return self._rng
+
+    def _unreachable(self):
+        rng = random.Random('{0}:{1}'.format(self.get_option('seed'), self._play_context.remote_addr))
+        return rng.random() < self.get_option('unreachable_probability')
+
+    def _round_trip(self):
+        rng = self._random()
+        distribution = self.get_option('latency_distribution')
+        mean = self.get_option('latency')
+        jitter = self.get_option('jitter')
+        if distribution == 'uniform':
+            delay = rng.uniform(mean - jitter, mean + jitter)
+        elif distribution == 'normal':
+            delay = rng.gauss(mean, jitter)
+        elif distribution == 'lognormal':
+            # parameters of the underlying normal distribution that give this mean and standard deviation
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2)) if mean > 0 else 0
+            delay = rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0
+        elif distribution == 'exponential':
+            delay = rng.expovariate(1 / mean) if mean > 0 else 0
+        else:
+            delay = mean
+        return max(delay, 0)
+
+    def _wait(self, size=0):
+        delay = self._round_trip()
+        bandwidth = self.get_option('bandwidth')
+        if size and bandwidth > 0:
+            delay += float(size) / bandwidth
+        if delay:
+            time.sleep(delay)
+
+    def _connect(self):
+        ''' wait for the simulated handshake, or fail it '''
+        if not self._connected:
+            if self._unreachable():
+                raise AnsibleConnectionFailure('simulated unreachable host %s' % self._play_context.remote_addr)
+            self._wait()
+        return super(Connection, self)._connect()
+
+    def exec_command(self, cmd, in_data=None, sudoable=True):
+        ''' run a command locally after one simulated round trip '''
+        self._connect()
+        self._wait(len(in_data) if in_data else 0)
+        return super(Connection, self).exec_command(cmd, in_data=in_data, sudoable=sudoable)
+
+    def put_file(self, in_path, out_path):
+        ''' copy a file locally, taking as long as sending it would '''
+        self._connect()
+        self._wait(os.path.getsize(in_path) if os.path.exists(in_path) else 0)
+        super(Connection, self).put_file(in_path, out_path)
+
+    def fetch_file(self, in_path, out_path):
+        ''' fetch a file locally, taking as long as receiving it would '''
+        self._connect()
+        self._wait(os.path.getsize(in_path) if os.path.exists(in_path) else 0)
+        super(Connection, self).fetch_file(in_path, out_path)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: vault_memo
+    version_added: "2.10"
+    short_description: decrypt an inline vaulted value once per process
+    description:
+        - Every reference to an inline C(!vault) variable derives the key and decrypts the value again.
+          This filter decrypts each unique ciphertext once and answers later references from a
+          dictionary keyed by the sha256 of the ciphertext.
+        - Plaintexts are kept in the memory of the process only and are never written anywhere.
+        - Tasks are templated in forked worker processes, so the memo lasts for one task on one host,
+          including all of its loop items. It does not carry over to the next task or host.
+        - Values that are not inline vaulted are returned unchanged.
+    positional: _input
+    options:
+      _input:
+        description: An inline vaulted variable.
+        required: true
+'''
+
+EXAMPLES = '''
+- debug:
+    msg: "{{ my_vaulted_password | vault_memo }}"
+  loop: "{{ range(1000) | list }}"
+'''
+
+import hashlib
+
+from ansible.parsing.yaml.objects import AnsibleVaultEncryptedUnicode
+
+MEMO = {}
+
+
+def vault_memo(value):
+    if not isinstance(value, AnsibleVaultEncryptedUnicode):
+        return value
+    # the ciphertext carries the vault id in its header, so equal ciphertexts decrypt to equal plaintexts
+    key = hashlib.sha256(value._ciphertext).digest()
+    plaintext = MEMO.get(key)
+    if plaintext is None:
+        plaintext = MEMO[key] = value.data
+    return plaintext
+
+
+class FilterModule(object):
+    ''' memoized vault decryption '''
+
+    def filters(self):
+        return {'vault_memo': vault_memo}
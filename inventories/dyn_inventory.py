@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 from argparse import ArgumentParser
 from pprint import pprint
+import hashlib
+import json
+import os
+import sys
 
 inventory = {'group_one': {'hosts': ['group_one_host_0{}'.format(i) for i in range(1, 6)]
                                     + ['group_one_and_two_host_0{}'.format(i) for i in range(1, 6)]
@@ -25,17 +29,103 @@ inventory = {'group_one': {'hosts': ['group_one_host_0{}'.format(i) for i in ran
                                     'group_two_host_01': {'group_two_host_01_has_this_var': True},
                                     'group_three_host_01': {'group_three_host_01_has_this_var': True}}}}
 
+# Synthetic inventory used when a host count is requested.  Group membership and
+# hostvars are derived from the host index, so --list can be streamed without
+# building the inventory in memory and --host never has to generate it.
+SYNTHETIC_HOST = 'synthetic_host_{:06d}'
+SYNTHETIC_GROUP = 'synthetic_group_{:04d}'
+
+
+def overlaps(index, overlap):
+    """Whether host `index` also belongs to the group following its primary one."""
+    return (index * 2654435761) % 4294967296 < overlap * 4294967296
+
+
+def synthetic_hostvars(index, num_groups):
+    return {'host_index': index, 'primary_group': SYNTHETIC_GROUP.format(index % num_groups)}
+
+
+def synthetic_host_index(host, num_hosts):
+    prefix = SYNTHETIC_HOST.split('{')[0]
+    if not host.startswith(prefix):
+        return None
+    try:
+        index = int(host[len(prefix):])
+    except ValueError:
+        return None
+    if 0 <= index < num_hosts and SYNTHETIC_HOST.format(index) == host:
+        return index
+    return None
+
+
+def stream_inventory(num_hosts, num_groups, overlap):
+    """Yield the synthetic inventory as chunks of a single JSON document."""
+    yield '{"all": {"vars": {"ansible_connection": "local", "inventories_var": true}}'
+    for group in range(num_groups):
+        yield ', {}: {{"vars": {}, "hosts": ['.format(json.dumps(SYNTHETIC_GROUP.format(group)),
+                                                     json.dumps({'is_in_synthetic_group': True, 'group_index': group}))
+        separator = ''
+        for index in range(group, num_hosts, num_groups):
+            yield separator + json.dumps(SYNTHETIC_HOST.format(index))
+            separator = ', '
+        if num_groups > 1:
+            for index in range((group - 1) % num_groups, num_hosts, num_groups):
+                if overlaps(index, overlap):
+                    yield separator + json.dumps(SYNTHETIC_HOST.format(index))
+                    separator = ', '
+        yield ']}'
+    yield ', "_meta": {"hostvars": {'
+    separator = ''
+    for index in range(num_hosts):
+        yield '{}{}: {}'.format(separator, json.dumps(SYNTHETIC_HOST.format(index)),
+                                json.dumps(synthetic_hostvars(index, num_groups)))
+        separator = ', '
+    yield '}}}\n'
+
+
+def fingerprint(num_hosts, num_groups, overlap):
+    """sha256 identifying the --list output, without generating it.
+
+    The static inventory is hashed as canonical JSON.  The synthetic one is a pure
+    function of its parameters and of this script, so those are hashed instead.
+    """
+    digest = hashlib.sha256()
+    if num_hosts > 0:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            digest.update(f.read())
+        digest.update(json.dumps([num_hosts, num_groups, overlap]).encode('utf-8'))
+    else:
+        digest.update(json.dumps(inventory, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return {'fingerprint': digest.hexdigest(), 'volatile': {}}
+
+
 def parse_args():
     parser = ArgumentParser()
     parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
                         help='List instances (default: True)')
     parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--num-hosts', type=int, default=os.environ.get('DYN_INVENTORY_NUM_HOSTS', '0'),
+                        help='Stream a synthetic inventory of this many hosts as JSON instead')
+    parser.add_argument('--num-groups', type=int, default=os.environ.get('DYN_INVENTORY_NUM_GROUPS', '10'),
+                        help='Number of groups in the synthetic inventory (default: 10)')
+    parser.add_argument('--overlap', type=float, default=os.environ.get('DYN_INVENTORY_OVERLAP', '0'),
+                        help='Fraction of synthetic hosts that also belong to a second group (default: 0)')
+    parser.add_argument('--fingerprint', action='store_true', help='Print a fingerprint of the inventory instead')
     return parser.parse_args()
 
 
 def load_inventory():
     args = parse_args()
-    if args.list_instances:
+    if args.fingerprint:
+        print(json.dumps(fingerprint(args.num_hosts, max(args.num_groups, 1), args.overlap)))
+    elif args.num_hosts > 0:
+        num_groups = max(args.num_groups, 1)
+        if args.requested_host:
+            index = synthetic_host_index(args.requested_host, args.num_hosts)
+            print(json.dumps({} if index is None else synthetic_hostvars(index, num_groups)))
+        else:
+            sys.stdout.writelines(stream_inventory(args.num_hosts, num_groups, args.overlap))
+    elif args.list_instances:
         pprint(inventory)
 
 
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 from argparse import ArgumentParser
 from datetime import datetime
+import hashlib
+import json
 import os
 
 inventory = {'all': {'vars': {'ansible_connection': 'local'}},
@@ -8,18 +10,43 @@ inventory = {'all': {'vars': {'ansible_connection': 'local'}},
              '_meta': {'hostvars': {'localhost': {'test_env': os.environ.get('TEST_ENV', False),
                                                   'current_time': str(datetime.now())}}}}
 
+# hostvars that change on every run without the inventory itself changing
+VOLATILE_HOSTVARS = ('current_time',)
+
+
+def split_volatile(inventory):
+    """Return the inventory without its volatile hostvars, and those hostvars by host."""
+    stable = dict(inventory)
+    stable['_meta'] = {'hostvars': {}}
+    volatile = {}
+    for host, hostvars in inventory['_meta']['hostvars'].items():
+        stable['_meta']['hostvars'][host] = dict((k, v) for k, v in hostvars.items() if k not in VOLATILE_HOSTVARS)
+        volatile[host] = dict((k, v) for k, v in hostvars.items() if k in VOLATILE_HOSTVARS)
+    return stable, volatile
+
+
+def fingerprint(inventory):
+    """sha256 of the inventory without its volatile hostvars, stable across runs."""
+    stable, volatile = split_volatile(inventory)
+    digest = hashlib.sha256(json.dumps(stable, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+    return {'fingerprint': digest, 'volatile': volatile}
+
 
 def parse_args():
     parser = ArgumentParser()
     parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
                         help='List instances (default: True)')
     parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--fingerprint', action='store_true',
+                        help='Print a fingerprint of the inventory that ignores volatile hostvars, and those hostvars')
     return parser.parse_args()
 
 
 def load_inventory():
     args = parse_args()
-    if args.list_instances:
+    if args.fingerprint:
+        print(json.dumps(fingerprint(inventory)))
+    elif args.list_instances:
         print(inventory)
 
 
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 from argparse import ArgumentParser
 from pprint import pprint
+import hashlib
 import json
+import os
 
 inventory = {'group_one': {'hosts': ['group_one_host_0{}'.format(i) for i in range(1, 6)]
                                     + ['group_one_and_two_host_0{}'.format(i) for i in range(1, 6)]
@@ -28,24 +30,76 @@ hostvars = {'group_one_host_01': {'group_one_host_01_has_this_var': True},
             'group_three_host_01': {'group_three_host_01_has_this_var': True}}
 
 
-def dumps(dct):
+def dumps(dct, compact=False):
+    if compact:
+        return json.dumps(dct, separators=(',', ':'))
     return json.dumps(dct, sort_keys=True, indent=4, separators=(',', ': '))
 
 
+def source_key(method):
+    """Identify the current revision of this script, by mtime/size or by content hash."""
+    source = os.path.abspath(__file__)
+    if method == 'hash':
+        with open(source, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    stat = os.stat(source)
+    return '{!r}:{}'.format(stat.st_mtime, stat.st_size)
+
+
+def cached_hostvars(cache_dir, method):
+    """Return hostvars pre-serialized as compact JSON, rebuilding the on-disk cache when stale."""
+    key = source_key(method)
+    path = os.path.join(cache_dir, 'metaless_dyn_inventory_hostvars.json')
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+        if cache.get('source_key') == key:
+            return cache['hostvars']
+    except (IOError, OSError, ValueError):
+        pass
+    cache = {'source_key': key,
+             'hostvars': dict((host, dumps(host_vars, compact=True)) for host, host_vars in hostvars.items())}
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    tmp_path = '{}.{}'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.rename(tmp_path, path)
+    return cache['hostvars']
+
+
 def parse_args():
     parser = ArgumentParser()
     parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
                         help='List instances (default: True)')
     parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--hosts', dest='requested_hosts',
+                        help='Get the variables for a comma separated list of instances in one call')
+    parser.add_argument('--compact', action='store_true', default=bool(os.environ.get('METALESS_INVENTORY_COMPACT')),
+                        help='Print compact JSON instead of indented, sorted JSON')
+    parser.add_argument('--cache-dir', default=os.environ.get('METALESS_INVENTORY_CACHE_DIR'),
+                        help='Serve host variables from a cache kept in this directory')
+    parser.add_argument('--cache-key', choices=('mtime', 'hash'),
+                        default=os.environ.get('METALESS_INVENTORY_CACHE_KEY', 'mtime'),
+                        help='Invalidate the cache on script mtime/size (default) or content hash')
     return parser.parse_args()
 
 
 def load_inventory():
     args = parse_args()
-    if args.requested_host:
-        print(dumps(hostvars.get(args.requested_host, {})))
+    if args.cache_dir and (args.requested_host or args.requested_hosts):
+        serialized = cached_hostvars(args.cache_dir, args.cache_key)
+        if args.requested_host:
+            print(serialized.get(args.requested_host, '{}'))
+        else:
+            print('{{{}}}'.format(','.join('{}:{}'.format(json.dumps(host), serialized.get(host, '{}'))
+                                           for host in args.requested_hosts.split(','))))
+    elif args.requested_host:
+        print(dumps(hostvars.get(args.requested_host, {}), args.compact))
+    elif args.requested_hosts:
+        print(dumps(dict((host, hostvars.get(host, {})) for host in args.requested_hosts.split(',')), args.compact))
     elif args.list_instances:
-        print(dumps(inventory))
+        print(dumps(inventory, args.compact))
     else:
         print({})
 
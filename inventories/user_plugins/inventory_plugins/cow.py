@@ -8,20 +8,140 @@ DOCUMENTATION = r'''
     description:
         - Ignores whatever you give it
         - Returns inventory containing "moooooo"
+        - When num_hosts is set, also returns a herd of synthetic hosts for import benchmarks,
+          optionally served from the inventory cache.
+    extends_documentation_fragment:
+      - inventory_cache
+    options:
+        plugin:
+            description: token that ensures this is a source file for the 'cow' plugin.
+            required: True
+            choices: ['cow']
+        num_hosts:
+            description: Number of synthetic hosts to add next to "moooooo".
+            type: int
+            default: 0
+        num_groups:
+            description: Number of synthetic groups, all children of the "cow" group.
+            type: int
+            default: 1
+        group_fanout:
+            description: Number of synthetic groups each synthetic host is a member of.
+            type: int
+            default: 1
+        hostvar_bytes:
+            description: Size of the "cow_payload" hostvar given to every synthetic host.
+            type: int
+            default: 0
+        status_ratios:
+            description:
+                - Fraction of synthetic hosts named with each status suffix, keyed by status.
+                - Suffixes are the ones gen_host_status.yml looks for in ansible_host, remaining hosts get "_ok".
+            type: dict
+            default: {}
+        seed:
+            description: Seed used to assign status suffixes.
+            type: int
+            default: 0
 '''
 
 EXAMPLES = r'''
     # mooooo
+    plugin: cow
+
+    # a 10k host herd for gen_host_status.yml, cached between ansible-inventory runs
+    plugin: cow
+    num_hosts: 10000
+    num_groups: 100
+    group_fanout: 2
+    hostvar_bytes: 1024
+    status_ratios:
+      changed: 0.1
+      failed: 0.05
+      unreachable: 0.01
+    cache: true
+    cache_plugin: jsonfile
+    cache_connection: /tmp/cow_inventory_cache
 '''
 
-from ansible.plugins.inventory import BaseInventoryPlugin
+import random
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
 
+STATUSES = ('changed', 'failed', 'unreachable', 'skipped', 'ignored', 'rescued')
 
-class InventoryModule(BaseInventoryPlugin):
+
+class InventoryModule(BaseInventoryPlugin, Cacheable):
 
     NAME = 'cow'
 
     def parse(self, inventory, loader, host_list, cache=True):
-        ''' doesnt parse the inventory file, but claims it did anyway '''
+        ''' always adds "moooooo", plus a synthetic herd when num_hosts is set '''
         super(InventoryModule, self).parse(inventory, loader, host_list)
         self.inventory.add_host('moooooo')
+
+        self._read_config_data(host_list)
+        if self.get_option('num_hosts') <= 0:
+            return
+
+        cache_key = self.get_cache_key(host_list)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        if attempt_to_read_cache:
+            try:
+                herd = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+        if not attempt_to_read_cache or cache_needs_update:
+            herd = self._generate_herd()
+        if cache_needs_update:
+            self._cache[cache_key] = herd
+
+        self._populate(herd)
+
+    def _generate_herd(self):
+        num_hosts = self.get_option('num_hosts')
+        num_groups = max(self.get_option('num_groups'), 1)
+        fanout = min(max(self.get_option('group_fanout'), 1), num_groups)
+        hostvar_bytes = self.get_option('hostvar_bytes')
+
+        ratios = self.get_option('status_ratios')
+        unknown = set(ratios) - set(STATUSES)
+        if unknown:
+            raise AnsibleParserError('Unknown cow status_ratios: {0}'.format(', '.join(sorted(unknown))))
+        if sum(ratios.values()) > 1:
+            raise AnsibleParserError('cow status_ratios must not add up to more than 1')
+
+        thresholds = []
+        total = 0.0
+        for status in STATUSES:
+            total += float(ratios.get(status, 0))
+            thresholds.append((total, status))
+
+        rng = random.Random(self.get_option('seed'))
+        host_vars = {'cow_payload': ('m' + 'o' * (hostvar_bytes - 1)) if hostvar_bytes > 0 else ''}
+        hosts = []
+        for index in range(num_hosts):
+            roll = rng.random()
+            status = next((status for threshold, status in thresholds if roll < threshold), 'ok')
+            groups = [(index + offset) % num_groups for offset in range(fanout)]
+            hosts.append(['cow_{0:06d}_{1}'.format(index, status), groups, host_vars])
+
+        return {'groups': ['cow_group_{0:04d}'.format(group) for group in range(num_groups)], 'hosts': hosts}
+
+    def _populate(self, herd):
+        self.inventory.add_group('cow')
+        self.inventory.set_variable('cow', 'ansible_connection', 'local')
+        groups = herd['groups']
+        for group in groups:
+            self.inventory.add_group(group)
+            self.inventory.add_child('cow', group)
+
+        for name, group_indexes, host_vars in herd['hosts']:
+            for group_index in group_indexes:
+                self.inventory.add_host(name, group=groups[group_index])
+            for key, value in host_vars.items():
+                self.inventory.set_variable(name, key, value)
@@ -2,19 +2,53 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 DOCUMENTATION = r'''
-    inventory: cow
+    inventory: fox
     version_added: "2.7"
     short_description: What does the fox say? No one knows, error!
     description:
         - Ignores whatever you give it
         - You will never find out what the fox says
+        - Stages num_hosts hosts and their group memberships in a buffer, erroring out part way through
+          to exercise import rollback. Only a complete buffer is committed, in one step, so an error
+          leaves the inventory as it was.
+    options:
+        plugin:
+            description: token that ensures this is a source file for the 'fox' plugin.
+            required: True
+            choices: ['fox']
+        num_hosts:
+            description: Number of hosts to stage.
+            type: int
+            default: 1
+        num_groups:
+            description: Number of groups the staged hosts are spread over.
+            type: int
+            default: 0
+        fail_at_host:
+            description:
+                - Error out once this many hosts have been staged, before anything is committed.
+                - Defaults to erroring after all of them. A value above num_hosts never errors.
+            type: int
+        fail_at_percent:
+            description: Error out once this percentage of the hosts have been staged, instead of fail_at_host.
+            type: float
 '''
 
 EXAMPLES = r'''
     # plugin: fox
+
+    # roll back an import after 25k of 50k hosts were staged
+    plugin: fox
+    num_hosts: 50000
+    num_groups: 50
+    fail_at_percent: 50
 '''
 
+from ansible.errors import AnsibleParserError
+from ansible.inventory.group import Group
+from ansible.inventory.host import Host
 from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.utils.path import basedir
 
 
 def ancient_mystery():
@@ -28,5 +62,45 @@ class InventoryModule(BaseInventoryPlugin):
     def parse(self, inventory, loader, host_list, cache=True):
         ''' doesnt parse the inventory file, but claims it did anyway '''
         super(InventoryModule, self).parse(inventory, loader, host_list)
-        self.inventory.add_host('fox')  # could be used to test rollback
-        ancient_mystery()
+        self._read_config_data(host_list)
+
+        num_hosts = self.get_option('num_hosts')
+        num_groups = self.get_option('num_groups')
+        fail_at = self.get_option('fail_at_host')
+        if self.get_option('fail_at_percent') is not None:
+            fail_at = int(num_hosts * self.get_option('fail_at_percent') / 100)
+        elif fail_at is None:
+            fail_at = num_hosts
+
+        hosts, groups = self._stage(num_hosts, num_groups, fail_at)
+        self._commit(hosts, groups)
+
+    def _stage(self, num_hosts, num_groups, fail_at):
+        ''' hosts and groups, with their memberships, built apart from the inventory '''
+        groups = dict((name, Group(name)) for name in ('fox_group_{0:04d}'.format(group) for group in range(num_groups)))
+        members = list(groups.values())
+        hosts = {}
+        for index in range(num_hosts):
+            if index == fail_at:
+                ancient_mystery()
+            name = 'fox' if index == 0 else 'fox_{0:06d}'.format(index)
+            host = Host(name)
+            # what inventory.add_host sets on a new host
+            source = self.inventory.current_source
+            host.set_variable('inventory_file', source)
+            host.set_variable('inventory_dir', basedir(source) if source else None)
+            if members:
+                members[index % num_groups].add_host(host)
+            hosts[name] = host
+        if num_hosts == fail_at:
+            ancient_mystery()
+        return hosts, groups
+
+    def _commit(self, hosts, groups):
+        ''' apply the whole buffer at once, reconcile_inventory parents it under all and ungrouped '''
+        clashes = set(hosts).intersection(self.inventory.hosts) | set(groups).intersection(self.inventory.groups)
+        if clashes:
+            raise AnsibleParserError('fox hosts or groups already in the inventory: %s' % ', '.join(sorted(clashes)[:10]))
+        self.inventory.groups.update(groups)
+        self.inventory.hosts.update(hosts)
+        self.inventory._groups_dict_cache = {}
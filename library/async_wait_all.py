@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+DOCUMENTATION = '''
+---
+module: async_wait_all
+short_description: Wait for many async jobs in a single remote invocation.
+description:
+    - Checks the status files of all given async jobs in one module run, backing off between
+      checks, until every job finished or the timeout passed. Replaces an async_status
+      until/retries loop per job.
+    - Runs through the async_wait_all action plugin, which passes in the async directory.
+version_added: "2.8"
+options:
+    jids:
+        description:
+            - Async job ids to wait for.
+        required: true
+    timeout:
+        description:
+            - Seconds to wait before giving up on the jobs still running.
+        default: 300
+    delay:
+        description:
+            - Seconds between the first checks. Doubled after every check that finds no newly
+              finished job, up to max_delay, and reset once a job finishes.
+        default: 0.1
+    max_delay:
+        description:
+            - Longest pause between two checks.
+        default: 2
+    cleanup:
+        description:
+            - Remove the status files of finished jobs.
+        default: false
+    fail_on_job_failure:
+        description:
+            - Fail when any of the jobs failed.
+        default: true
+requirements: []
+'''
+
+EXAMPLES = '''
+- shell: "sleep {{ item }}"
+  async: 60
+  poll: 0
+  loop: [1, 2, 3]
+  register: fired
+
+- async_wait_all:
+    jids: "{{ fired.results | map(attribute='ansible_job_id') | list }}"
+    timeout: 60
+'''
+
+
+def job_status(log_path, jid):
+    """Return the finished job's result, or None while it is still running."""
+    if not os.path.exists(log_path):
+        return dict(ansible_job_id=jid, started=1, finished=1, failed=True, msg="could not find job")
+    try:
+        with open(log_path) as f:
+            data = json.loads(f.read())
+    except Exception:
+        # file not written yet, the job is still running
+        return None
+    if 'started' in data:
+        return None
+    data['finished'] = 1
+    data['ansible_job_id'] = jid
+    return data
+
+
+def main():
+    module = AnsibleModule(argument_spec=dict(
+        jids=dict(type='list', required=True),
+        timeout=dict(type='float', default=300),
+        delay=dict(type='float', default=0.1),
+        max_delay=dict(type='float', default=2),
+        cleanup=dict(type='bool', default=False),
+        fail_on_job_failure=dict(type='bool', default=True),
+        # passed in from the async_wait_all action plugin
+        _async_dir=dict(type='path', required=True),
+    ))
+
+    logdir = os.path.expanduser(module.params['_async_dir'])
+    initial_delay = max(module.params['delay'], 0.01)
+    max_delay = max(module.params['max_delay'], initial_delay)
+    start = time.time()
+    deadline = start + module.params['timeout']
+
+    pending = list(module.params['jids'])
+    jobs = {}
+    checks = 0
+    delay = initial_delay
+    while True:
+        checks += 1
+        still_pending = []
+        for jid in pending:
+            data = job_status(os.path.join(logdir, jid), jid)
+            if data is None:
+                still_pending.append(jid)
+            else:
+                jobs[jid] = data
+        progressed = len(still_pending) < len(pending)
+        pending = still_pending
+
+        now = time.time()
+        if not pending or now >= deadline:
+            break
+        time.sleep(min(delay, deadline - now))
+        delay = initial_delay if progressed else min(delay * 2, max_delay)
+
+    if module.params['cleanup']:
+        for jid in jobs:
+            log_path = os.path.join(logdir, jid)
+            if os.path.exists(log_path):
+                os.unlink(log_path)
+
+    failed_jobs = [jid for jid, data in jobs.items() if data.get('failed')]
+    result = dict(changed=any(data.get('changed') for data in jobs.values()), jobs=jobs, pending=pending,
+                  finished=sorted(jobs), failed_jobs=failed_jobs, checks=checks, elapsed=time.time() - start)
+    if pending:
+        module.fail_json(msg="%d of %d jobs still running after %s seconds"
+                         % (len(pending), len(module.params['jids']), module.params['timeout']), **result)
+    if failed_jobs and module.params['fail_on_job_failure']:
+        module.fail_json(msg="%d of %d jobs failed" % (len(failed_jobs), len(module.params['jids'])), **result)
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import stat
+
+from ansible.module_utils.basic import AnsibleModule
+
+DOCUMENTATION = '''
+---
+module: batch_file
+short_description: Create, stat or remove a whole batch of directories in one invocation.
+description:
+    - Batched counterpart of the file module for file_benchmark_generated.yml, so per item
+      and batched throughput can be compared on the same workload.
+version_added: "2.8"
+options:
+    paths:
+        description:
+            - Directories to operate on.
+        required: true
+    state:
+        description:
+            - C(directory) creates missing directories and their parents, C(stat) reports
+              whether each path exists, its type, mode and size, and C(absent) removes them,
+              directories recursively and anything else with unlink.
+        choices: ['directory', 'stat', 'absent']
+        default: directory
+    mode:
+        description:
+            - Permissions of created directories, as with the file module.
+    prune:
+        description:
+            - With C(state=absent), the directory the paths were generated under. Parents of the
+              removed paths that are left empty are removed as well, up to but not including it,
+              so nested workloads do not leave their intermediate directories behind.
+requirements: []
+'''
+
+EXAMPLES = '''
+- batch_file:
+    paths: "{{ file_benchmark_paths }}"
+    state: directory
+    mode: '0700'
+
+- batch_file:
+    paths: "{{ file_benchmark_paths }}"
+    state: absent
+    prune: "{{ file_benchmark_root }}"
+'''
+
+
+def parse_mode(mode):
+    if mode is None or isinstance(mode, int):
+        return mode
+    return int(mode, 8)
+
+
+def path_type(st_mode):
+    if stat.S_ISDIR(st_mode):
+        return 'directory'
+    if stat.S_ISREG(st_mode):
+        return 'file'
+    if stat.S_ISLNK(st_mode):
+        return 'link'
+    return 'other'
+
+
+def stat_path(path):
+    """Existence, type, mode and size of path, without following a final symlink."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return dict(exists=False)
+    return dict(exists=True, type=path_type(st.st_mode), mode='%04o' % stat.S_IMODE(st.st_mode), size=st.st_size)
+
+
+def prune_parents(path, root):
+    """Remove the empty parents of path below root, returns how many were removed."""
+    removed = 0
+    parent = os.path.dirname(path)
+    while parent != root and os.path.commonpath([parent, root]) == root:
+        try:
+            os.rmdir(parent)
+        except OSError:
+            # not empty, still used by other paths
+            break
+        removed += 1
+        parent = os.path.dirname(parent)
+    return removed
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(paths=dict(type='list', required=True),
+                           state=dict(choices=['directory', 'stat', 'absent'], default='directory'),
+                           mode=dict(type='raw'),
+                           prune=dict(type='path')),
+        supports_check_mode=True)
+    paths = module.params['paths']
+    state = module.params['state']
+    prune = module.params['prune']
+    if prune:
+        prune = os.path.abspath(prune).rstrip(os.sep) or os.sep
+    try:
+        mode = parse_mode(module.params['mode'])
+    except ValueError:
+        module.fail_json(msg="mode must be an octal number, got %s" % module.params['mode'])
+
+    changed = 0
+    pruned = 0
+    missing = []
+    stats = {}
+    for path in paths:
+        try:
+            if state == 'stat':
+                stats[path] = stat_path(path)
+                if not os.path.isdir(path):
+                    missing.append(path)
+            elif state == 'directory':
+                if not os.path.isdir(path):
+                    changed += 1
+                    if not module.check_mode:
+                        os.makedirs(path)
+                        if mode is not None:
+                            os.chmod(path, mode)
+                elif mode is not None and os.stat(path).st_mode & 0o7777 != mode:
+                    changed += 1
+                    if not module.check_mode:
+                        os.chmod(path, mode)
+            elif os.path.lexists(path):
+                changed += 1
+                if not module.check_mode:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.unlink(path)
+                    if prune:
+                        pruned += prune_parents(os.path.abspath(path), prune)
+        except (IOError, OSError) as e:
+            module.fail_json(msg="%s failed for %s: %s" % (state, path, e), changed=changed > 0)
+
+    module.exit_json(changed=changed > 0, paths=len(paths), changed_paths=changed, missing=missing, pruned=pruned,
+                     stats=stats)
+
+
+if __name__ == '__main__':
+    main()
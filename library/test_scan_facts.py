@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import json
 import os
+import random
 
 from ansible.module_utils.basic import * # noqa
 
@@ -13,6 +15,26 @@ description:
     - Return sample facts into facts namespace.
 version_added: "2.3"
 options:
+    target_bytes:
+        description:
+            - Approximate UTF-8 size of an additional, nested C(scan_payload) fact serialized as JSON, keys included. No payload when 0.
+        default: 0
+    depth:
+        description:
+            - Nesting depth of the payload.
+        default: 1
+    breadth:
+        description:
+            - Number of keys at every level of the payload.
+        default: 1
+    unicode_ratio:
+        description:
+            - Fraction of payload characters outside of ASCII.
+        default: 0
+    seed:
+        description:
+            - Seed for the payload contents, the same options always produce the same payload.
+        default: 0
 requirements: []
 author: Chris Meyers, Christopher Wang
 '''
@@ -42,11 +64,64 @@ EXAMPLES = '''
     },
     "changed": false
 }
+
+# Add a 1 MB payload, 3 levels of 10 keys deep, a third of it non-ASCII
+- test_scan_facts:
+    target_bytes: 1048576
+    depth: 3
+    breadth: 10
+    unicode_ratio: 0.3
 '''
 
+ASCII_CHARS = u"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+UNICODE_CHARS = u"鵟犭酜귃ꔀꈛ竳䙭韽ࠔ"
+BLOCK_SIZE = 4096
+
+
+def overhead_bytes(depth=1, breadth=1):
+    """UTF-8 size of the payload serialized as JSON with every leaf empty: the keys,
+    quotes, separators and braces that are not part of the leaves."""
+    def level(remaining):
+        if remaining == 0:
+            return u''
+        return dict(('key_%d' % i, level(remaining - 1)) for i in range(breadth))
+
+    return len(json.dumps(level(depth), ensure_ascii=False).encode('utf-8'))
+
+
+def build_payload(target_bytes, depth=1, breadth=1, unicode_ratio=0, seed=0):
+    """Build a nested dict of breadth ** depth string leaves, about target_bytes once serialized as JSON.
+
+    Leaves are rotated slices of one repeated random block, so the cost is a single
+    copy per leaf no matter how large the payload is.
+    """
+    rng = random.Random(seed)
+    leaves = breadth ** depth
+    block = u''.join(rng.choice(UNICODE_CHARS) if rng.random() < unicode_ratio else rng.choice(ASCII_CHARS)
+                     for i in range(BLOCK_SIZE))
+    # non-ASCII characters used here take 3 bytes in UTF-8, so size leaves by what the block actually holds
+    char_bytes = len(block.encode('utf-8')) / float(BLOCK_SIZE)
+    leaf_bytes = (target_bytes - overhead_bytes(depth, breadth)) / float(leaves)
+    leaf_chars = max(int(leaf_bytes / char_bytes), 1)
+    pool = block * (leaf_chars // BLOCK_SIZE + 2)
+
+    def level(remaining):
+        if remaining == 0:
+            offset = rng.randrange(BLOCK_SIZE)
+            return pool[offset:offset + leaf_chars]
+        return dict(('key_%d' % i, level(remaining - 1)) for i in range(breadth))
+
+    return level(depth)
+
+
 def main():
     module = AnsibleModule(
-        argument_spec = dict())
+        argument_spec = dict(target_bytes=dict(type='int', default=0),
+                             depth=dict(type='int', default=1),
+                             breadth=dict(type='int', default=1),
+                             unicode_ratio=dict(type='float', default=0),
+                             seed=dict(type='int', default=0)))
+    params = module.params
 
     string="abc"
     unicode_string="鵟犭酜귃ꔀꈛ竳䙭韽ࠔ"
@@ -67,6 +142,20 @@ def main():
 
     results = dict(ansible_facts=dict(string=string, unicode_string=unicode_string, int=int, float=float, bool=bool,
                                       null=null, list=list, obj=obj, empty_list=empty_list, empty_obj=empty_obj))
+
+    if params['target_bytes'] > 0:
+        if params['depth'] < 0 or params['breadth'] < 1:
+            module.fail_json(msg="depth must be at least 0 and breadth at least 1")
+        if not 0 <= params['unicode_ratio'] <= 1:
+            module.fail_json(msg="unicode_ratio must be between 0 and 1")
+        if (params['breadth'] ** params['depth'] + overhead_bytes(params['depth'], params['breadth']) >
+                params['target_bytes']):
+            module.fail_json(msg="breadth ** depth leaves and their keys do not fit in target_bytes")
+        results['ansible_facts']['scan_payload'] = build_payload(params['target_bytes'], params['depth'],
+                                                                 params['breadth'], params['unicode_ratio'],
+                                                                 params['seed'])
     module.exit_json(**results)
 
-main()
+
+if __name__ == '__main__':
+    main()
@@ -9,10 +9,56 @@ DOCUMENTATION = """
     short_description: generate random string
     description:
         - This lookup returns a random string.
+        - All requested strings are cut from a single read of random bytes, so one call can cheaply
+          return thousands of them.
+    options:
+      count:
+        description: Number of strings to return.
+        type: int
+        default: 1
+      length:
+        description: Length of each string.
+        type: int
+        default: 12
+      charset:
+        description:
+          - Characters to build the strings from, at most 256 of them, taken literally.
+          - Takes precedence over charset_name.
+        type: str
+      charset_name:
+        description: Name of a character set from python's string module to build the strings from.
+        type: str
+        default: ascii_lowercase
+        choices: ['ascii_letters', 'ascii_lowercase', 'ascii_uppercase', 'digits', 'hexdigits', 'octdigits',
+                  'punctuation', 'printable']
+      seed:
+        description: Seed for reproducible strings.
+        type: int
+      secure:
+        description: Read the random bytes from os.urandom instead of a (seedable) pseudo random generator.
+        type: bool
+        default: False
 """
-from ansible.errors import AnsibleError, AnsibleParserError
+
+EXAMPLES = """
+- name: a single random name, as before
+  debug:
+    msg: "org-{{ lookup('randstr') }}"
+
+- name: thousands of reproducible names from one lookup call
+  debug:
+    msg: "{{ query('randstr', count=5000, length=8, charset_name='hexdigits', seed=42) }}"
+
+- name: strings made of the letters d, i, g, t and s
+  debug:
+    msg: "{{ lookup('randstr', charset='digits') }}"
+"""
+
+from ansible.errors import AnsibleError
 from ansible.plugins.lookup import LookupBase
 
+import binascii
+import os
 import string
 import random
 
@@ -23,7 +69,59 @@ except ImportError:
     display = Display()
 
 
+def random_bytes(rng, size):
+    if rng is None:
+        return os.urandom(size)
+    # little endian, as int.to_bytes would give on python 3
+    return binascii.unhexlify('%0*x' % (size * 2, rng.getrandbits(size * 8)))[::-1]
+
+
+def random_chars(rng, charset, total):
+    """Map random bytes onto charset, dropping the bytes that would bias the result."""
+    size = len(charset)
+    limit = 256 - 256 % size
+    ascii_only = all(ord(char) < 128 for char in charset)
+    if ascii_only:
+        table = bytes(bytearray(ord(charset[byte % size]) for byte in range(256)))
+        rejected = bytes(bytearray(range(limit, 256)))
+
+    chunks = []
+    found = 0
+    while found < total:
+        raw = random_bytes(rng, (total - found) * 256 // limit + 16)
+        if ascii_only:
+            chunk = raw.translate(table, rejected).decode('ascii')
+        else:
+            chunk = u''.join(charset[byte % size] for byte in bytearray(raw) if byte < limit)
+        chunks.append(chunk)
+        found += len(chunk)
+    return u''.join(chunks)[:total]
+
+
 class LookupModule(LookupBase):
 
     def run(self, terms, variables=None, **kwargs):
-        return [''.join(random.choice(string.ascii_lowercase) for i in range(12))]
+        self.set_options(var_options=variables, direct=kwargs)
+        count = self.get_option('count')
+        length = self.get_option('length')
+        charset = self.get_option('charset')
+        charset_name = self.get_option('charset_name')
+        if length < 1:
+            raise AnsibleError('randstr length must be at least 1, got %d' % length)
+        if count < 0:
+            raise AnsibleError('randstr count must not be negative, got %d' % count)
+        if charset is None:
+            charset = getattr(string, charset_name)
+        if not 0 < len(charset) <= 256:
+            raise AnsibleError('randstr charset must have between 1 and 256 characters')
+
+        seed = self.get_option('seed')
+        if self.get_option('secure'):
+            if seed is not None:
+                raise AnsibleError('randstr cannot combine secure with a seed')
+            rng = None
+        else:
+            rng = random.Random(seed)
+
+        chars = random_chars(rng, charset, count * length)
+        return [chars[start:start + length] for start in range(0, count * length, length)]
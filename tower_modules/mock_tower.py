@@ -0,0 +1,575 @@
+#!/usr/bin/env python
+"""In-memory stand-in for the Tower/AWX REST API, to run the tower_modules suites offline.
+
+Serves /api/v2/ on the loopback interface. Resources are generic: any
+/api/v2/<collection>/ that AWX has can be listed with Django style filters and paging, created
+with POST, read, changed and deleted at /api/v2/<collection>/<id>/, and related to
+other objects at /api/v2/<collection>/<id>/<related>/. Launching and updating
+create jobs that go from pending over running to successful, and the settings
+and the demo objects of a fresh install are there from the start.
+
+Every request's latency is recorded by endpoint, see GET /_mock/stats, and
+POST /_mock/reset restores the initial state:
+
+    python tower_modules/mock_tower.py --port 8013 --stats-file /tmp/mock_tower_stats.json
+    TOWER_HOST=http://127.0.0.1:8013 ansible-playbook tower_modules/wrapper.yml -e tower_module_under_test=label
+"""
+from argparse import ArgumentParser
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import copy
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+VERSION = '11.2.0'
+API = '/api/v2/'
+
+FOREIGN_KEYS = {'organization': 'organizations', 'inventory': 'inventories', 'project': 'projects',
+                'source_project': 'projects', 'credential': 'credentials', 'credential_type': 'credential_types',
+                'job_template': 'job_templates', 'workflow_job_template': 'workflow_job_templates',
+                'unified_job_template': 'job_templates', 'inventory_source': 'inventory_sources',
+                'host': 'hosts', 'group': 'groups', 'team': 'teams', 'user': 'users',
+                'notification_template': 'notification_templates', 'job': 'jobs', 'workflow_job': 'workflow_jobs'}
+# related names that are not a collection of the same name
+RELATED_COLLECTIONS = {'object_roles': 'roles', 'children': 'groups', 'all_hosts': 'hosts', 'admins': 'users',
+                       'members': 'users', 'extra_credentials': 'credentials', 'workflow_nodes': 'workflow_job_template_nodes',
+                       'success_nodes': 'workflow_job_template_nodes', 'failure_nodes': 'workflow_job_template_nodes',
+                       'always_nodes': 'workflow_job_template_nodes', 'notification_templates_started': 'notification_templates',
+                       'notification_templates_success': 'notification_templates',
+                       'notification_templates_error': 'notification_templates'}
+RELATED = {'organizations': ['users', 'admins', 'teams', 'inventories', 'projects', 'credentials', 'labels',
+                             'notification_templates', 'instance_groups', 'object_roles'],
+           'teams': ['users', 'roles', 'object_roles'],
+           'users': ['teams', 'organizations', 'roles'],
+           'inventories': ['hosts', 'groups', 'inventory_sources', 'instance_groups', 'object_roles'],
+           'groups': ['hosts', 'children', 'all_hosts'],
+           'hosts': ['groups'],
+           'inventory_sources': ['update', 'inventory_updates', 'schedules', 'notification_templates_started',
+                                 'notification_templates_success', 'notification_templates_error'],
+           'projects': ['update', 'project_updates', 'schedules', 'object_roles', 'notification_templates_started',
+                        'notification_templates_success', 'notification_templates_error'],
+           'job_templates': ['launch', 'jobs', 'credentials', 'labels', 'instance_groups', 'survey_spec', 'schedules',
+                             'object_roles', 'notification_templates_started', 'notification_templates_success',
+                             'notification_templates_error'],
+           'workflow_job_templates': ['launch', 'workflow_jobs', 'workflow_nodes', 'labels', 'survey_spec',
+                                      'schedules', 'object_roles', 'notification_templates_started',
+                                      'notification_templates_success', 'notification_templates_error'],
+           'workflow_job_template_nodes': ['success_nodes', 'failure_nodes', 'always_nodes', 'credentials'],
+           'credentials': ['object_roles'],
+           'notification_templates': ['test', 'notifications'],
+           'jobs': ['cancel', 'relaunch', 'stdout', 'job_events', 'labels', 'credentials'],
+           'workflow_jobs': ['cancel', 'relaunch', 'workflow_nodes', 'labels'],
+           'project_updates': ['cancel', 'stdout'],
+           'inventory_updates': ['cancel', 'stdout']}
+# fields unique together by collection, the first one is required
+UNIQUE = {'organizations': ('name',), 'users': ('username',), 'teams': ('name', 'organization'),
+          'credentials': ('name', 'organization', 'credential_type'), 'credential_types': ('name', 'kind'),
+          'inventories': ('name', 'organization'), 'hosts': ('name', 'inventory'), 'groups': ('name', 'inventory'),
+          'inventory_sources': ('name', 'inventory'), 'projects': ('name', 'organization'), 'job_templates': ('name',),
+          'labels': ('name', 'organization'), 'notification_templates': ('name', 'organization'),
+          'workflow_job_templates': ('name', 'organization')}
+ROLES = {'organizations': ['admin_role', 'execute_role', 'project_admin_role', 'inventory_admin_role',
+                           'credential_admin_role', 'workflow_admin_role', 'notification_admin_role',
+                           'job_template_admin_role', 'auditor_role', 'member_role', 'read_role'],
+         'teams': ['admin_role', 'member_role', 'read_role'],
+         'inventories': ['admin_role', 'update_role', 'adhoc_role', 'use_role', 'read_role'],
+         'projects': ['admin_role', 'use_role', 'update_role', 'read_role'],
+         'credentials': ['admin_role', 'use_role', 'read_role'],
+         'job_templates': ['admin_role', 'execute_role', 'read_role'],
+         'workflow_job_templates': ['admin_role', 'execute_role', 'approval_role', 'read_role']}
+# what launching or updating an object creates, and the foreign key pointing back at it
+ACTIONS = {('job_templates', 'launch'): ('jobs', 'job_template'),
+           ('workflow_job_templates', 'launch'): ('workflow_jobs', 'workflow_job_template'),
+           ('projects', 'update'): ('project_updates', 'project'),
+           ('inventory_sources', 'update'): ('inventory_updates', 'inventory_source')}
+UNIFIED_JOBS = ('jobs', 'workflow_jobs', 'project_updates', 'inventory_updates', 'ad_hoc_commands', 'system_jobs')
+ACTIVE = ('new', 'pending', 'waiting', 'running')
+SETTINGS = {'AWX_PROOT_ENABLED': True, 'AWX_PROOT_BASE_PATH': '/tmp', 'AWX_PROOT_SHOW_PATHS': [],
+            'AWX_PROOT_HIDE_PATHS': [], 'AWX_TASK_ENV': {}, 'AD_HOC_COMMANDS': ['command', 'shell', 'ping'],
+            'SCHEDULE_MAX_JOBS': 10, 'TOWER_URL_BASE': 'https://towerhost', 'LOG_AGGREGATOR_ENABLED': False}
+VENV_BASE = '/var/lib/awx/venv'
+CUSTOM_VIRTUALENVS = [VENV_BASE + '/ansible/']
+ID_SEGMENT = re.compile(r'/\d+/')
+# every collection the API knows, anything else is a 404 rather than a new empty list
+COLLECTIONS = frozenset(set(FOREIGN_KEYS.values()) | set(RELATED_COLLECTIONS.values()) | set(RELATED) | set(UNIQUE) |
+                        set(ROLES) | set(target for target, field in ACTIONS.values()) | set(UNIFIED_JOBS) |
+                        {'roles', 'labels', 'instance_groups', 'instances', 'schedules', 'notifications', 'job_events',
+                         'unified_jobs', 'unified_job_templates', 'system_job_templates', 'workflow_job_nodes',
+                         'workflow_approvals', 'applications', 'tokens', 'credential_input_sources',
+                         'execution_environments', 'activity_stream'})
+
+
+def singular(collection):
+    if collection.endswith('ies'):
+        return collection[:-3] + 'y'
+    return collection[:-1] if collection.endswith('s') else collection
+
+
+def now():
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000000Z', time.gmtime())
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, body):
+        super(ApiError, self).__init__(status)
+        self.status = status
+        self.body = body
+
+
+class MockTower(object):
+    ''' the API's state, and what each request does to it '''
+
+    def __init__(self, job_duration=1.0):
+        self.job_duration = job_duration
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.objects = defaultdict(dict)  # collection -> id -> object
+            self.counters = defaultdict(int)
+            self.associations = defaultdict(set)  # (collection, id, related) -> ids
+            self.started = {}  # (collection, id) -> time a job was created
+            self.settings = copy.deepcopy(SETTINGS)
+            self._seed()
+
+    def _seed(self):
+        ''' the objects a fresh install comes with '''
+        org = self.create('organizations', {'name': 'Default', 'description': ''})
+        admin = self.create('users', {'username': 'admin', 'is_superuser': True, 'email': 'admin@example.com'})
+        self.associations[('organizations', org['id'], 'admins')].add(admin['id'])
+        kinds = [('Machine', 'ssh'), ('Source Control', 'scm'), ('Vault', 'vault'), ('Network', 'net'),
+                 ('Amazon Web Services', 'cloud'), ('Microsoft Azure Resource Manager', 'cloud'),
+                 ('Google Compute Engine', 'cloud'), ('OpenStack', 'cloud'), ('VMware vCenter', 'cloud'),
+                 ('Red Hat Satellite 6', 'cloud'), ('Insights', 'insights'), ('Ansible Tower', 'cloud')]
+        for name, kind in kinds:
+            self.create('credential_types', {'name': name, 'kind': kind, 'managed_by_tower': True, 'inputs': {},
+                                             'injectors': {}})
+        credential = self.create('credentials', {'name': 'Demo Credential', 'credential_type': 1,
+                                                 'organization': None, 'inputs': {'username': 'admin'}})
+        inventory = self.create('inventories', {'name': 'Demo Inventory', 'organization': org['id'], 'variables': ''})
+        self.create('hosts', {'name': 'localhost', 'inventory': inventory['id'],
+                              'variables': 'ansible_connection: local'})
+        project = self.create('projects', {'name': 'Demo Project', 'organization': org['id'], 'scm_type': 'git',
+                                           'scm_url': 'https://github.com/ansible/ansible-tower-samples',
+                                           'status': 'successful'})
+        template = self.create('job_templates', {'name': 'Demo Job Template', 'project': project['id'],
+                                                 'inventory': inventory['id'], 'playbook': 'hello_world.yml',
+                                                 'job_type': 'run', 'extra_vars': ''})
+        self.associations[('job_templates', template['id'], 'credentials')].add(credential['id'])
+
+    # objects
+
+    def get(self, collection, pk):
+        obj = self.objects[collection].get(pk)
+        if obj is None:
+            raise ApiError(404, {'detail': 'Not found.'})
+        if collection in UNIFIED_JOBS:
+            self._advance(collection, obj)
+        return obj
+
+    def _advance(self, collection, obj):
+        ''' jobs run for job_duration seconds after they are created, then succeed '''
+        if obj['status'] not in ACTIVE:
+            return
+        elapsed = time.time() - self.started[(collection, obj['id'])]
+        if elapsed >= self.job_duration:
+            obj.update(status='successful', failed=False, finished=now(), elapsed=round(elapsed, 3))
+        elif elapsed > 0:
+            obj['status'] = 'running'
+
+    def render(self, collection, obj):
+        ''' the object with its related links and summary fields '''
+        url = '{0}{1}/{2}/'.format(API, collection, obj['id'])
+        related = dict((name, '{0}{1}/'.format(url, name)) for name in RELATED.get(collection, []))
+        summary = {}
+        for field, target in FOREIGN_KEYS.items():
+            pk = obj.get(field)
+            if isinstance(pk, int) and pk in self.objects[target]:
+                related[field] = '{0}{1}/{2}/'.format(API, target, pk)
+                other = self.objects[target][pk]
+                summary[field] = {'id': pk, 'name': other.get('name', other.get('username'))}
+        if collection in ROLES:
+            summary['object_roles'] = dict(
+                (field, {'id': obj['roles'][field], 'name': field[:-5].replace('_', ' ').title(), 'description': ''})
+                for field in ROLES[collection])
+        rendered = dict((k, v) for k, v in obj.items() if k != 'roles')
+        rendered.update(url=url, related=related, summary_fields=summary)
+        return rendered
+
+    def _validate(self, collection, data, pk=None):
+        for field, value in data.items():
+            target = FOREIGN_KEYS.get(field)
+            if target and value is not None and value not in self.objects[target]:
+                raise ApiError(400, {field: ['Invalid pk "{0}" - object does not exist.'.format(value)]})
+        venv = data.get('custom_virtualenv')
+        if venv and venv.rstrip('/') + '/' not in CUSTOM_VIRTUALENVS:
+            raise ApiError(400, {'custom_virtualenv': ['{0} is not a valid virtualenv in {1}'.format(venv, VENV_BASE)]})
+        unique = UNIQUE.get(collection)
+        if not unique:
+            return
+        if pk is None and not data.get(unique[0]):
+            raise ApiError(400, {unique[0]: ['This field is required.']})
+        merged = dict(self.objects[collection].get(pk, {}), **data)
+        key = tuple(merged.get(field) for field in unique)
+        for other in self.objects[collection].values():
+            if other['id'] != pk and tuple(other.get(field) for field in unique) == key:
+                raise ApiError(400, {'__all__': ['{0} with this {1} already exists.'.format(
+                    singular(collection).replace('_', ' ').title(), ' and '.join(f.title() for f in unique))]})
+
+    def create(self, collection, data, parent=None):
+        self._validate(collection, data)
+        self.counters[collection] += 1
+        pk = self.counters[collection]
+        obj = {'id': pk, 'type': singular(collection), 'created': now(), 'modified': now(), 'description': ''}
+        obj.update(data)
+        if collection in ROLES:
+            obj['roles'] = {}
+            for field in ROLES[collection]:
+                role = self.create('roles', {'name': field[:-5].replace('_', ' ').title(), 'role_field': field,
+                                             'resource_type': singular(collection), 'resource_id': pk})
+                obj['roles'][field] = role['id']
+        if collection == 'tokens':
+            obj['token'] = 'mocktoken{0}'.format(pk)
+        if collection in UNIFIED_JOBS:
+            obj.setdefault('status', 'pending')
+            obj.update(failed=False, started=now(), finished=None, elapsed=0.0)
+            self.started[(collection, pk)] = time.time()
+        self.objects[collection][pk] = obj
+        if parent:
+            self.associations[parent].add(pk)
+        return obj
+
+    def update(self, collection, pk, data):
+        obj = self.get(collection, pk)
+        self._validate(collection, data, pk=pk)
+        obj.update(data, modified=now())
+        return obj
+
+    def delete(self, collection, pk):
+        self.get(collection, pk)
+        del self.objects[collection][pk]
+        for key in list(self.associations):
+            parent_collection, parent_pk, name = key
+            if (parent_collection, parent_pk) == (collection, pk):
+                del self.associations[key]
+            elif RELATED_COLLECTIONS.get(name, name) == collection:
+                self.associations[key].discard(pk)
+
+    # lists
+
+    def matches(self, obj, field, value):
+        name, _, lookup = field.partition('__')
+        actual = obj.get(name)
+        if lookup == 'in':
+            return str(actual) in value.split(',')
+        if lookup == 'isnull':
+            return (actual is None) == (value.lower() in ('true', '1'))
+        if isinstance(actual, bool):
+            actual = 'true' if actual else 'false'
+            value = value.lower()
+        actual = '' if actual is None else str(actual)
+        if lookup == 'iexact':
+            return actual.lower() == value.lower()
+        if lookup == 'icontains':
+            return value.lower() in actual.lower()
+        if lookup == 'contains':
+            return value in actual
+        if lookup == 'startswith':
+            return actual.startswith(value)
+        return actual == value
+
+    def page(self, path, objects, query):
+        ''' a page of filtered objects, like a Django REST framework list view '''
+        page = int(query.pop('page', 1) or 1)
+        page_size = min(int(query.pop('page_size', 25) or 25), 200)
+        order_by = query.pop('order_by', 'id')
+        search = query.pop('search', None)
+        for field in ('format', 'role_level', 'not__id'):
+            query.pop(field, None)
+        results = [obj for obj in objects if all(self.matches(obj, field, value) for field, value in query.items())]
+        if search:
+            results = [obj for obj in results if search.lower() in (obj.get('name') or '').lower()]
+        field = order_by.lstrip('-')
+        results.sort(key=lambda obj: (0, obj[field], '') if isinstance(obj.get(field), int) else (1, 0, str(obj.get(field))),
+                     reverse=order_by.startswith('-'))
+        count = len(results)
+        start = (page - 1) * page_size
+        links = {}
+        for name, number in (('next', page + 1), ('previous', page - 1)):
+            valid = number >= 1 and (number - 1) * page_size < count
+            links[name] = '{0}?{1}'.format(path, urlencode(dict(query, page=number, page_size=page_size))) if valid else None
+        return {'count': count, 'next': links['next'], 'previous': links['previous'],
+                'results': results[start:start + page_size]}
+
+    def related(self, collection, pk, name):
+        ''' objects in a related list: those pointing at the parent and those associated with it '''
+        self.get(collection, pk)
+        target = RELATED_COLLECTIONS.get(name, name)
+        ids = set(self.associations[(collection, pk, name)])
+        field = singular(collection)
+        if name not in RELATED_COLLECTIONS:
+            ids.update(obj['id'] for obj in self.objects[target].values() if obj.get(field) == pk)
+        if name == 'object_roles':
+            ids.update(self.objects[collection][pk].get('roles', {}).values())
+        return target, [self.get(target, other) for other in sorted(ids) if other in self.objects[target]]
+
+    # actions
+
+    def action(self, collection, pk, name, data):
+        obj = self.get(collection, pk)
+        if name == 'relaunch':
+            template = next((target, field) for (source, _), (target, field) in ACTIONS.items() if target == collection)
+            collection, pk, name = FOREIGN_KEYS[template[1]], obj[template[1]], 'launch'
+            obj = self.get(collection, pk)
+        if (collection, name) in ACTIONS:
+            target, field = ACTIONS[(collection, name)]
+            extra_vars = data.get('extra_vars', obj.get('extra_vars') or {})
+            job = self.create(target, {field: pk, 'name': obj.get('name'), 'launch_type': 'manual',
+                                       'inventory': data.get('inventory', obj.get('inventory')),
+                                       'project': obj.get('project'), 'playbook': obj.get('playbook'),
+                                       'extra_vars': extra_vars if isinstance(extra_vars, str) else json.dumps(extra_vars)})
+            return 201, dict(self.render(target, job), **{singular(target): job['id'], 'ignored_fields': {}})
+        if name == 'cancel':
+            if obj.get('status') not in ACTIVE:
+                raise ApiError(405, {'error': 'Job has already finished and cannot be canceled.'})
+            obj.update(status='canceled', failed=True, finished=now())
+            return 202, None
+        if name == 'test':
+            notification = self.create('notifications', {'notification_template': pk, 'status': 'successful'})
+            return 202, {'notification': notification['id']}
+        if name == 'copy':
+            fields = dict((k, v) for k, v in obj.items() if k not in ('id', 'roles', 'created', 'modified'))
+            fields['name'] = data.get('name', '{0} copy'.format(obj.get('name')))
+            return 201, self.render(collection, self.create(collection, fields))
+        raise ApiError(404, {'detail': 'Not found.'})
+
+    def launch_info(self, collection, pk):
+        obj = self.get(collection, pk)
+        asks = dict((k, v) for k, v in obj.items() if k.startswith('ask_'))
+        return dict(asks, can_start_without_user_input=True, passwords_needed_to_start=[],
+                    variables_needed_to_start=[], credential_needed_to_start=False,
+                    inventory_needed_to_start=False, survey_enabled=obj.get('survey_enabled', False),
+                    job_template_data={'id': pk, 'name': obj.get('name'), 'description': obj.get('description', '')},
+                    defaults={'extra_vars': obj.get('extra_vars', ''), 'inventory': {'id': obj.get('inventory')}})
+
+    # dispatch
+
+    def handle(self, method, path, query, data):
+        ''' answer one request with (status, body) '''
+        if path in ('/api/', '/api'):
+            return 200, {'description': 'AWX REST API', 'current_version': API, 'available_versions': {'v2': API}}
+        if not path.startswith(API):
+            raise ApiError(404, {'detail': 'Not found.'})
+        parts = [part for part in path[len(API):].split('/') if part]
+        with self.lock:
+            if not parts:
+                return 200, dict((name, '{0}{1}/'.format(API, name)) for name in sorted(
+                    COLLECTIONS | {'ping', 'config', 'me', 'settings'}))
+            collection = parts[0]
+            if collection in ('ping', 'config'):
+                return 200, {'version': VERSION, 'ha': False, 'active_node': 'localhost', 'license_info': {
+                    'license_type': 'enterprise', 'valid_key': True, 'compliant': True}, 'instances': [],
+                    'custom_virtualenvs': CUSTOM_VIRTUALENVS}
+            if collection == 'me':
+                return 200, self.page(path, [self.render('users', self.get('users', 1))], {})
+            if collection == 'settings':
+                return self.handle_settings(method, parts[1:], data)
+            if collection not in COLLECTIONS:
+                raise ApiError(404, {'detail': 'Not found.'})
+            if len(parts) == 1:
+                if method == 'GET':
+                    listing = self.page(path, list(self.objects[collection].values()), query)
+                    listing['results'] = [self.render(collection, obj) for obj in listing['results']]
+                    return 200, listing
+                if method == 'POST':
+                    return 201, self.render(collection, self.create(collection, data))
+                raise ApiError(405, {'detail': 'Method "{0}" not allowed.'.format(method)})
+            pk = int(parts[1]) if parts[1].isdigit() else None
+            if pk is None:
+                raise ApiError(404, {'detail': 'Not found.'})
+            if len(parts) == 2:
+                if method == 'GET':
+                    return 200, self.render(collection, self.get(collection, pk))
+                if method in ('PATCH', 'PUT'):
+                    return 200, self.render(collection, self.update(collection, pk, data))
+                if method == 'DELETE':
+                    self.delete(collection, pk)
+                    return 204, None
+                raise ApiError(405, {'detail': 'Method "{0}" not allowed.'.format(method)})
+            return self.handle_related(method, path, collection, pk, parts[2], query, data)
+
+    def handle_related(self, method, path, collection, pk, name, query, data):
+        obj = self.get(collection, pk)
+        if name == 'survey_spec':
+            if method == 'GET':
+                return 200, obj.get('survey_spec', {})
+            if method == 'DELETE':
+                obj.pop('survey_spec', None)
+                return 200, {}
+            obj['survey_spec'] = data
+            return 200, {}
+        if name == 'stdout':
+            return 200, {'content': '', 'range': {'start': 0, 'end': 0, 'absolute_end': 0}}
+        if name == 'cancel' and method == 'GET':
+            return 200, {'can_cancel': obj.get('status') in ACTIVE}
+        if name in ('launch', 'update') and method == 'GET':
+            return 200, self.launch_info(collection, pk)
+        if method == 'POST' and name in ('launch', 'update', 'cancel', 'relaunch', 'test', 'copy'):
+            return self.action(collection, pk, name, data)
+        if RELATED_COLLECTIONS.get(name, name) not in COLLECTIONS:
+            raise ApiError(404, {'detail': 'Not found.'})
+        if method == 'GET':
+            target, objects = self.related(collection, pk, name)
+            listing = self.page(path, objects, query)
+            listing['results'] = [self.render(target, other) for other in listing['results']]
+            return 200, listing
+        if method == 'POST':
+            target = RELATED_COLLECTIONS.get(name, name)
+            if 'id' not in data:
+                # creating through a related list points the new object at its parent
+                if name not in RELATED_COLLECTIONS:
+                    data = dict(data, **{singular(collection): pk})
+                return 201, self.render(target, self.create(target, data, parent=(collection, pk, name)))
+            self.get(target, data['id'])
+            if data.get('disassociate'):
+                self.associations[(collection, pk, name)].discard(data['id'])
+            else:
+                self.associations[(collection, pk, name)].add(data['id'])
+            return 204, None
+        raise ApiError(405, {'detail': 'Method "{0}" not allowed.'.format(method)})
+
+    def handle_settings(self, method, parts, data):
+        if not parts:
+            return 200, self.page(API + 'settings/', [{'url': '{0}settings/{1}/'.format(API, name), 'slug': name,
+                                                      'name': name.title()} for name in ('all', 'jobs', 'system')], {})
+        if method in ('PATCH', 'PUT'):
+            errors = {}
+            for key, value in data.items():
+                current = self.settings.get(key)
+                if current is not None and value is not None and type(current) is not type(value):
+                    errors[key] = ['Expected a {0} but got type "{1}".'.format(type(current).__name__,
+                                                                              type(value).__name__)]
+            if errors:
+                raise ApiError(400, errors)
+            self.settings.update(data)
+        elif method == 'DELETE':
+            self.settings = copy.deepcopy(SETTINGS)
+            return 204, None
+        return 200, dict(self.settings)
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def _respond(self, status, body):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        start = time.time()
+        split = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            data = json.loads(raw) if raw else {}
+            if split.path == '/_mock/stats':
+                status, body = 200, self.server.stats()
+            elif split.path == '/_mock/reset':
+                self.server.tower.reset()
+                status, body = 204, None
+            else:
+                status, body = self.server.tower.handle(self.command, split.path, dict(parse_qsl(split.query)), data)
+        except ApiError as e:
+            status, body = e.status, e.body
+        except ValueError as e:
+            status, body = 400, {'detail': 'JSON parse error - {0}'.format(e)}
+        except Exception as e:
+            status, body = 500, {'detail': '{0}: {1}'.format(type(e).__name__, e)}
+        self._respond(status, body)
+        if not split.path.startswith('/_mock/'):
+            self.server.record(self.command, split.path, status, time.time() - start)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class MockTowerServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, job_duration=1.0, verbose=False):
+        ThreadingHTTPServer.__init__(self, address, Handler)
+        self.tower = MockTower(job_duration=job_duration)
+        self.verbose = verbose
+        self.latencies = defaultdict(list)  # "METHOD /api/v2/<collection>/{id}/" -> seconds
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address[:2])
+
+    def record(self, method, path, status, seconds):
+        endpoint = '{0} {1}'.format(method, ID_SEGMENT.sub('/{id}/', path if path.endswith('/') else path + '/'))
+        self.latencies[endpoint].append(seconds)
+
+    def stats(self):
+        endpoints = {}
+        for endpoint, seconds in list(self.latencies.items()):
+            ordered = sorted(seconds)
+            endpoints[endpoint] = {'count': len(ordered), 'total': sum(ordered),
+                                   'p50': ordered[len(ordered) // 2], 'p95': ordered[min(int(len(ordered) * 0.95),
+                                                                                         len(ordered) - 1)],
+                                   'max': ordered[-1]}
+        return {'requests': sum(stat['count'] for stat in endpoints.values()),
+                'seconds': sum(stat['total'] for stat in endpoints.values()), 'endpoints': endpoints}
+
+
+def start(host='127.0.0.1', port=0, job_duration=1.0, verbose=False):
+    ''' a server answering in a background thread, port 0 picks a free port '''
+    server = MockTowerServer((host, port), job_duration=job_duration, verbose=verbose)
+    thread = threading.Thread(target=server.serve_forever, name='mock_tower')
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8013, help='Port to listen on, 0 for any (default: 8013)')
+    parser.add_argument('--job-duration', type=float, default=1.0,
+                        help='Seconds launched jobs and updates run before they succeed (default: 1.0)')
+    parser.add_argument('--stats-file', help='Write the per endpoint latencies to this file on exit')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = MockTowerServer((args.host, args.port), job_duration=args.job_duration, verbose=args.verbose)
+    print('mock Tower listening on {0}'.format(server.url), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.stats_file:
+            with open(args.stats_file, 'w') as f:
+                json.dump(server.stats(), f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""Run the tower module suites of main.yml in parallel shards against mock Towers.
+
+Every worker of the process pool is a shard with its own mock_tower.py server on
+a free loopback port. It runs wrapper.yml once per module it is handed, with
+TOWER_HOST pointing at its server, which is reset to a fresh install in between:
+
+    python tower_modules/run_shards.py --shards 8
+    python tower_modules/run_shards.py --modules label,organization,job_launch --results /tmp/shards.json
+
+Each run's output goes to --log-dir. The summary lists every module's result and
+time, and the number and total latency of the API requests it made.
+"""
+from argparse import ArgumentParser
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import yaml
+
+import mock_tower
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER = None  # the mock of the current shard
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--shards', type=int, default=multiprocessing.cpu_count(),
+                        help='Parallel shards, each with its own mock (default: number of CPUs)')
+    parser.add_argument('--modules', help='Comma separated modules to test (default: all of main.yml)')
+    parser.add_argument('--collection-id', default='awx.awx', help='Collection with the modules (default: awx.awx)')
+    parser.add_argument('--job-duration', type=float, default=1.0,
+                        help='Seconds mock jobs run before they succeed (default: 1.0)')
+    parser.add_argument('--log-dir', default='shard_logs', help='Where each module run writes its output')
+    parser.add_argument('--results', help='Write the results as JSON to this file')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='ansible-playbook executable')
+    return parser.parse_args()
+
+
+def suite_modules():
+    ''' the modules main.yml loops over that have a suite of tasks '''
+    with open(os.path.join(HERE, 'main.yml')) as f:
+        plays = yaml.safe_load(f)
+    modules = [module for play in plays for task in play['tasks'] for module in task.get('loop', [])]
+    return [module for module in modules if os.path.exists(os.path.join(HERE, 'tower_' + module, 'tasks', 'main.yml'))]
+
+
+def start_shard(job_duration):
+    global SERVER
+    SERVER = mock_tower.start(job_duration=job_duration)
+
+
+def run_module(job):
+    module, args = job
+    SERVER.tower.reset()
+    SERVER.latencies.clear()
+    env = dict(os.environ, TOWER_HOST=SERVER.url, CONTROLLER_HOST=SERVER.url, TOWER_USERNAME='admin',
+               TOWER_PASSWORD='password', TOWER_VERIFY_SSL='False', CONTROLLER_VERIFY_SSL='False',
+               ANSIBLE_NOCOLOR='1')
+    command = [args.ansible_playbook, 'wrapper.yml', '-i', 'localhost,', '-c', 'local',
+               '-e', 'tower_module_under_test={0}'.format(module), '-e', 'collection_id={0}'.format(args.collection_id),
+               '-e', 'ansible_python_interpreter={{ ansible_playbook_python }}']
+    start = time.time()
+    with open(os.path.join(args.log_dir, module + '.log'), 'w') as log:
+        rc = subprocess.call(command, cwd=HERE, env=env, stdin=subprocess.DEVNULL, stdout=log,
+                             stderr=subprocess.STDOUT)
+    stats = SERVER.stats()
+    return {'module': module, 'rc': rc, 'seconds': time.time() - start, 'shard': os.getpid(),
+            'requests': stats['requests'], 'api_seconds': stats['seconds'], 'endpoints': stats['endpoints']}
+
+
+def main():
+    args = parse_args()
+    modules = args.modules.split(',') if args.modules else suite_modules()
+    if not os.path.isdir(args.log_dir):
+        os.makedirs(args.log_dir)
+    args.log_dir = os.path.abspath(args.log_dir)
+
+    start = time.time()
+    pool = multiprocessing.Pool(max(min(args.shards, len(modules)), 1), initializer=start_shard,
+                                initargs=(args.job_duration,))
+    results = []
+    try:
+        for result in pool.imap_unordered(run_module, [(module, args) for module in modules]):
+            print('{0:<24} {1:<6} {2:>8.1f}s  {3:>6} requests'.format(
+                result['module'], 'ok' if result['rc'] == 0 else 'FAILED', result['seconds'], result['requests']),
+                flush=True)
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+    wall_time = time.time() - start
+
+    failed = sorted(result['module'] for result in results if result['rc'])
+    serial = sum(result['seconds'] for result in results)
+    print('{0} modules in {1:.1f}s on {2} shards, {3:.1f}s back to back, {4} failed{5}'.format(
+        len(results), wall_time, args.shards, serial, len(failed), ': ' + ', '.join(failed) if failed else ''))
+    if args.results:
+        with open(args.results, 'w') as f:
+            json.dump({'wall_time': wall_time, 'shards': args.shards, 'modules': results}, f, indent=2, sort_keys=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""Compare per host add_host with add_hosts on dynamic_inventory_scaled.yml.
+
+Runs the playbook with --tags per_host and --tags bulk for every number of hosts
+and reports wall time and peak RSS, which is the controller's: it holds the
+inventory and outgrows the workers.
+
+    python utils/add_hosts_benchmark.py --num-hosts 1000,10000,50000
+
+Every add_host loop item is a task result of its own that reconciles the whole
+inventory, so per host runs get slow; above --per-host-limit they are skipped.
+"""
+from argparse import ArgumentParser
+import os
+import tempfile
+
+from run_benchmarks import csv, run_playbook, write_inventory
+
+PLAYBOOK = 'dynamic_inventory_scaled.yml'
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--num-hosts', type=csv(int), default=[1000, 10000, 50000],
+                        help='Comma separated numbers of hosts to add (default: 1000,10000,50000)')
+    parser.add_argument('--per-host-limit', type=int, default=10000,
+                        help='Skip per host runs above this many hosts (default: 10000)')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='ansible-playbook executable')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    inventory = write_inventory(tempfile.mkdtemp(prefix='add_hosts_'), 1)
+    print('{0:>10} {1:<9} {2:>10} {3:>14} {4:>4}'.format('hosts', 'tags', 'wall time', 'peak RSS', 'rc'))
+    for num_hosts in args.num_hosts:
+        for tags in ('per_host', 'bulk'):
+            if tags == 'per_host' and num_hosts > args.per_host_limit:
+                print('{0:>10} {1:<9} {2:>10}'.format(num_hosts, tags, 'skipped'))
+                continue
+            os.environ['ANSIBLE_RUN_TAGS'] = tags
+            args.extra_vars = ['num_hosts={0}'.format(num_hosts)]
+            result = run_playbook(args, PLAYBOOK, inventory, 5, 'linear')
+            print('{0:>10} {1:<9} {2:>9.2f}s {3:>11} kB {4:>4}'.format(num_hosts, tags, result['wall_time'],
+                                                                      result['peak_rss_kb'], result['rc']), flush=True)
+
+
+if __name__ == '__main__':
+    main()
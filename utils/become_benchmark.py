@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""Time build_become_command of become_plugins/custom_plugin.py in a tight loop.
+
+The unique success marker generated by BecomeBase is timed on its own as well, so
+the plugin's own share of the cost can be told apart from it.
+
+    python utils/become_benchmark.py --iterations 1000000 [--password secret]
+"""
+from argparse import ArgumentParser
+import os
+import timeit
+
+from ansible.plugins.become import BecomeBase
+from ansible.plugins.loader import become_loader, shell_loader
+
+BECOME_PLUGINS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'become_plugins')
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=1000000, help='Calls to time (default: 1000000)')
+    parser.add_argument('--rounds', type=int, default=5, help='Split the calls over this many rounds (default: 5)')
+    parser.add_argument('--user', default='root', help='become_user (default: root)')
+    parser.add_argument('--flags', default='-H -S -n', help='become_flags (default: -H -S -n)')
+    parser.add_argument('--exe', default='sudo', help='become_exe (default: sudo)')
+    parser.add_argument('--password', help='become_pass, exercises the password prompt path')
+    parser.add_argument('--command', default='/usr/bin/python -c "print(1)"', help='Command to wrap')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    become_loader.add_directory(BECOME_PLUGINS)
+    plugin = become_loader.get('custom_plugin')
+    plugin.set_options(direct={'become_user': args.user, 'become_flags': args.flags,
+                               'become_exe': args.exe, 'become_pass': args.password})
+    shell = shell_loader.get('sh')
+    shell.executable = '/bin/sh'
+
+    print(plugin.build_become_command(args.command, shell))
+    # best of several rounds, the difference between the two timings is easily lost in noise otherwise
+    number = max(args.iterations // args.rounds, 1)
+    elapsed = min(timeit.Timer(lambda: plugin.build_become_command(args.command, shell)).repeat(args.rounds, number))
+    base = min(timeit.Timer(lambda: BecomeBase.build_become_command(plugin, args.command, shell)).repeat(args.rounds,
+                                                                                                         number))
+    print('{0} calls per round, {1:.0f}ns per call, {2:.0f}ns of it in custom_plugin itself'.format(
+        number, elapsed / number * 1e9, (elapsed - base) / number * 1e9))
+
+
+if __name__ == '__main__':
+    main()
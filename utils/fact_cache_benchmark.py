@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Compare the jsonfile and mmapfile fact cache plugins.
+
+Every host gets the facts of library/test_scan_facts.py, with a scan_payload of
+--target-bytes. Each plugin writes them for all hosts, then a new instance reads
+them back, as the next ansible-playbook run would, reads the facts of a single
+host, and deletes all of them one host at a time, as meta clear_facts does:
+
+    python utils/fact_cache_benchmark.py --num-hosts 1000,5000 --target-bytes 65536
+
+The files left in the cache directory are counted after writing and after clearing.
+"""
+from argparse import ArgumentParser
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+
+from ansible.plugins.loader import cache_loader
+
+from run_benchmarks import csv
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--num-hosts', type=csv(int), default=[1000],
+                        help='Comma separated numbers of hosts (default: 1000)')
+    parser.add_argument('--target-bytes', type=int, default=65536, help='Size of every scan_payload (default: 65536)')
+    parser.add_argument('--depth', type=int, default=3, help='Nesting depth of the payload (default: 3)')
+    parser.add_argument('--breadth', type=int, default=10, help='Keys at every level of the payload (default: 10)')
+    parser.add_argument('--unicode-ratio', type=float, default=0.3,
+                        help='Fraction of non-ASCII payload characters (default: 0.3)')
+    parser.add_argument('--plugins', type=csv(str), default=['jsonfile', 'mmapfile'],
+                        help='Comma separated cache plugins (default: jsonfile,mmapfile)')
+    parser.add_argument('--dir', help='Directory the caches are written to (default: a temporary one)')
+    return parser.parse_args()
+
+
+def load_scan_facts():
+    spec = importlib.util.spec_from_file_location('test_scan_facts',
+                                                  os.path.join(REPO, 'library', 'test_scan_facts.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def count_files(directory):
+    files, size = 0, 0
+    for entry in os.listdir(directory):
+        files += 1
+        size += os.path.getsize(os.path.join(directory, entry))
+    return files, size
+
+
+def timed(function, *args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def write_all(cache, hosts, facts):
+    for host in hosts:
+        cache.set(host, dict(facts, inventory_hostname=host))
+
+
+def read_all(cache):
+    for host in cache.keys():
+        cache.get(host)
+
+
+def read_one(cache, host):
+    if cache.contains(host):
+        cache.get(host)
+
+
+def delete_all(cache, hosts):
+    for host in hosts:
+        cache.delete(host)
+
+
+def main():
+    args = parse_args()
+    scan_facts = load_scan_facts()
+    facts = {'scan_payload': scan_facts.build_payload(args.target_bytes, args.depth, args.breadth, args.unicode_ratio)}
+    cache_loader.add_directory(os.path.join(REPO, 'cache_plugins'))
+    root = args.dir or tempfile.mkdtemp(prefix='fact_cache_')
+
+    print('{0:>7} {1:<9} {2:>10} {3:>10} {4:>10} {5:>10} {6:>7} {7:>12} {8:>7}'.format(
+        'hosts', 'plugin', 'write/s', 'read/s', 'read one', 'clear/s', 'files', 'bytes', 'cleared'))
+    for num_hosts in args.num_hosts:
+        hosts = ['host-{0}'.format(i) for i in range(num_hosts)]
+        for plugin in args.plugins:
+            directory = os.path.join(root, '{0}-{1}'.format(plugin, num_hosts))
+            shutil.rmtree(directory, ignore_errors=True)
+
+            def cache():
+                return cache_loader.get(plugin, _uri=directory, _prefix='', _timeout=0)
+
+            write = timed(write_all, cache(), hosts, facts)
+            files, size = count_files(directory)
+            read = timed(read_all, cache())
+            one = timed(read_one, cache(), hosts[num_hosts // 2])
+            clear = timed(delete_all, cache(), hosts)
+            left = count_files(directory)[0]
+            print('{0:>7} {1:<9} {2:>10.0f} {3:>10.0f} {4:>9.1f}ms {5:>10.0f} {6:>7} {7:>12} {8:>7}'.format(
+                num_hosts, plugin, num_hosts / write, num_hosts / read, one * 1000, num_hosts / clear,
+                files, size, left), flush=True)
+    if not args.dir:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
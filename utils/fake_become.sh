@@ -0,0 +1,11 @@
+#!/bin/sh
+# Stand-in become_exe for measuring become overhead without a real sudo:
+# drops sudo style options and runs the wrapped command as the current user.
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -u|-p) shift 2 ;;
+        -*) shift ;;
+        *) break ;;
+    esac
+done
+exec "$@"
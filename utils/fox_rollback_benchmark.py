@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Time partial imports of the fox inventory plugin and the rollback that follows.
+
+For every number of hosts and failure point, ansible-inventory parses a fox source
+that stages that many hosts and errors out once the given percentage of them is
+staged. Wall time and peak RSS of the ansible-inventory process are reported; a
+point above 100 never errors and gives the successful import as a baseline:
+
+    python utils/fox_rollback_benchmark.py --num-hosts 1000,10000,50000 --fail-at-percent 0,50,100,101
+"""
+from argparse import ArgumentParser
+import os
+import subprocess
+import tempfile
+import time
+
+from run_benchmarks import csv
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGINS = os.path.join(REPO, 'inventories', 'user_plugins', 'inventory_plugins')
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--num-hosts', type=csv(int), default=[1000, 10000, 50000],
+                        help='Comma separated numbers of hosts to stage (default: 1000,10000,50000)')
+    parser.add_argument('--fail-at-percent', type=csv(float), default=[0, 50, 100, 101],
+                        help='Comma separated failure points, in percent of the hosts (default: 0,50,100,101)')
+    parser.add_argument('--num-groups', type=int, default=50, help='Groups the hosts are spread over (default: 50)')
+    parser.add_argument('--ansible-inventory', default='ansible-inventory', help='ansible-inventory executable')
+    return parser.parse_args()
+
+
+def write_source(directory, num_hosts, num_groups, percent):
+    path = os.path.join(directory, 'fox_{0}_{1:g}.yaml'.format(num_hosts, percent))
+    with open(path, 'w') as f:
+        f.write('plugin: fox\nnum_hosts: {0}\nnum_groups: {1}\nfail_at_percent: {2}\n'.format(
+            num_hosts, num_groups, percent))
+    return path
+
+
+def run_inventory(args, source):
+    """Parse one source and collect the wall time and resource usage of ansible-inventory."""
+    # only the auto plugin, so the other ones do not try the source again once fox errors out
+    env = dict(os.environ, ANSIBLE_INVENTORY_PLUGINS=PLUGINS, ANSIBLE_INVENTORY_ENABLED='auto')
+    start = time.time()
+    # --graph rather than --list, which resolves the vars of every host and dwarfs the import
+    proc = subprocess.Popen([args.ansible_inventory, '-i', source, '--graph'], env=env, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # wait4 instead of proc.wait() to get the resource usage of this process tree alone
+    _, status, usage = os.wait4(proc.pid, 0)
+    return time.time() - start, usage.ru_maxrss, os.waitstatus_to_exitcode(status)
+
+
+def main():
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix='fox_rollback_')
+    print('{0:>10} {1:>8} {2:>10} {3:>10} {4:>14} {5:>4}'.format('hosts', 'fail at', 'staged', 'wall time',
+                                                                 'peak RSS', 'rc'))
+    for num_hosts in args.num_hosts:
+        for percent in args.fail_at_percent:
+            staged = min(int(num_hosts * percent / 100), num_hosts)
+            wall_time, peak_rss, rc = run_inventory(args, write_source(directory, num_hosts, args.num_groups, percent))
+            print('{0:>10} {1:>7g}% {2:>10} {3:>9.2f}s {4:>11} kB {5:>4}'.format(
+                num_hosts, percent, staged, wall_time, peak_rss, rc), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+"""Generate the directory workload of file_benchmark.yml as a vars file.
+
+    python utils/gen_file_benchmark.py --num-paths 10000 --depth 2 --fanout 16 --output /tmp/paths.json
+    ansible-playbook -i inventory file_benchmark_generated.yml -e paths_file=/tmp/paths.json
+
+Paths look like the hard-coded ones in file_benchmark.yml (<root>/<md5>), nested
+under `depth` levels of at most `fanout` directories each. The root is written
+as file_benchmark_root, which batch_file prunes the emptied levels up to.
+"""
+from argparse import ArgumentParser
+import hashlib
+import json
+import os
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--num-paths', type=int, default=1000, help='Number of paths (default: 1000)')
+    parser.add_argument('--depth', type=int, default=0, help='Directory levels above each path (default: 0)')
+    parser.add_argument('--fanout', type=int, default=16, help='Directories per level (default: 16)')
+    parser.add_argument('--seed', default='0', help='Seed for the path names (default: 0)')
+    parser.add_argument('--root', default='/opt/test', help='Directory the paths are created under (default: /opt/test)')
+    parser.add_argument('--output', default='file_benchmark_paths.json', help='Vars file to write')
+    return parser.parse_args()
+
+
+def generate_paths(num_paths, depth, fanout, seed, root):
+    for index in range(num_paths):
+        digest = hashlib.md5('{0}-{1}'.format(seed, index).encode('utf-8')).hexdigest()
+        levels = ['{0:02x}'.format(int(digest[2 * level:2 * level + 2], 16) % fanout) for level in range(depth)]
+        yield os.path.join(root, *(levels + [digest]))
+
+
+def main():
+    args = parse_args()
+    paths = list(generate_paths(args.num_paths, args.depth, max(args.fanout, 1), args.seed, args.root))
+    with open(args.output, 'w') as f:
+        json.dump({'file_benchmark_paths': paths, 'file_benchmark_root': args.root}, f, indent=0)
+    print('{0} paths written to {1}'.format(len(paths), args.output))
+
+
+if __name__ == '__main__':
+    main()
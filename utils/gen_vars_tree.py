@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Generate an inventory with a large group_vars/host_vars tree.
+
+    python utils/gen_vars_tree.py /tmp/vars_tree --num-hosts 20000 --num-groups 1000
+    ansible-inventory -i /tmp/vars_tree/inventory.ini --list
+
+Every group and host gets a vars file.  A fraction of them get a directory of
+several files instead, the other layout group_vars and host_vars support.
+"""
+from argparse import ArgumentParser
+import json
+import os
+import random
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('dest', help='Directory to write inventory.ini, group_vars and host_vars to')
+    parser.add_argument('--num-hosts', type=int, default=10000, help='Number of hosts (default: 10000)')
+    parser.add_argument('--num-groups', type=int, default=500, help='Number of groups (default: 500)')
+    parser.add_argument('--num-vars', type=int, default=20, help='Variables per vars file (default: 20)')
+    parser.add_argument('--dir-ratio', type=float, default=0.1,
+                        help='Fraction of hosts and groups with a directory of vars files (default: 0.1)')
+    parser.add_argument('--files-per-dir', type=int, default=3, help='Vars files in each such directory (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the variable values (default: 0)')
+    return parser.parse_args()
+
+
+def vars_file(rng, name, num_vars):
+    """YAML for num_vars variables of the usual shapes, one per line."""
+    lines = []
+    for index in range(num_vars):
+        kind = index % 4
+        if kind == 0:
+            value = rng.randint(0, 1 << 30)
+        elif kind == 1:
+            value = '{0}-{1:08x}'.format(name, rng.getrandbits(32))
+        elif kind == 2:
+            value = [rng.randint(0, 1000) for _ in range(5)]
+        else:
+            value = {'enabled': rng.random() < 0.5, 'port': rng.randint(1024, 65535), 'owner': name}
+        lines.append('{0}_var_{1}: {2}\n'.format(name, index, json.dumps(value)))
+    return ''.join(lines)
+
+
+def write_vars(rng, directory, name, num_vars, dir_ratio, files_per_dir):
+    if rng.random() < dir_ratio:
+        entity_dir = os.path.join(directory, name)
+        os.makedirs(entity_dir)
+        for part in range(files_per_dir):
+            with open(os.path.join(entity_dir, '{0:02d}.yml'.format(part)), 'w') as f:
+                f.write(vars_file(rng, '{0}_{1}'.format(name, part), num_vars))
+        return files_per_dir
+    with open(os.path.join(directory, name + '.yml'), 'w') as f:
+        f.write(vars_file(rng, name, num_vars))
+    return 1
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    num_groups = max(args.num_groups, 1)
+    groups = ['group_{0:05d}'.format(index) for index in range(num_groups)]
+    hosts = ['host_{0:06d}'.format(index) for index in range(args.num_hosts)]
+    for subdir in ('group_vars', 'host_vars'):
+        os.makedirs(os.path.join(args.dest, subdir))
+
+    with open(os.path.join(args.dest, 'inventory.ini'), 'w') as f:
+        for group_index, group in enumerate(groups):
+            f.write('[{0}]\n'.format(group))
+            f.writelines(host + '\n' for host in hosts[group_index::num_groups])
+        f.write('\n[all:vars]\nansible_connection=local\n')
+
+    files = 0
+    for group in groups + ['all']:
+        files += write_vars(rng, os.path.join(args.dest, 'group_vars'), group, args.num_vars, args.dir_ratio,
+                            args.files_per_dir)
+    for host in hosts:
+        files += write_vars(rng, os.path.join(args.dest, 'host_vars'), host, args.num_vars, args.dir_ratio,
+                            args.files_per_dir)
+    print('{0} hosts, {1} groups and {2} vars files written to {3}'.format(len(hosts), len(groups), files, args.dest))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Generate a playbook with many inline vaulted vars spread over several vault ids.
+
+    python utils/gen_vault_playbook.py /tmp/vault_bench --num-vars 1000 --num-vault-ids 4
+    python utils/vault_benchmark.py /tmp/vault_bench
+
+Writes one password file per vault id, vault_vars.yml with the vaulted vars and
+vault_benchmark.yml, which references all of them a number of times, either
+directly (tag direct) or through filter_plugins/vault_memo.py (tag memo).
+"""
+from argparse import ArgumentParser
+import os
+
+from ansible.parsing.vault import VaultLib, VaultSecret
+
+PLAYBOOK = '''# ansible-playbook -i localhost, -c local vault_benchmark.yml {vault_ids} -t direct|memo
+# the memo tag needs filter_plugins from the repository: ANSIBLE_FILTER_PLUGINS={filter_plugins}
+- hosts: all
+  gather_facts: false
+  vars_files:
+    - vault_vars.yml
+  vars:
+    references: 10
+  tasks:
+    - name: decrypt every vaulted var on every reference
+      debug:
+        msg: "{{{{ [{direct}] | join(',') | length }}}}"
+      loop: "{{{{ range(references | int) | list }}}}"
+      tags: direct
+
+    - name: decrypt every vaulted var once
+      debug:
+        msg: "{{{{ [{memo}] | join(',') | length }}}}"
+      loop: "{{{{ range(references | int) | list }}}}"
+      tags: memo
+'''
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('dest', help='Directory to write the playbook, vars and password files to')
+    parser.add_argument('--num-vars', type=int, default=1000, help='Number of vaulted vars (default: 1000)')
+    parser.add_argument('--num-vault-ids', type=int, default=4, help='Number of vault ids (default: 4)')
+    parser.add_argument('--value-length', type=int, default=32, help='Length of each plaintext (default: 32)')
+    return parser.parse_args()
+
+
+def vault_ids(num_vault_ids):
+    return ['bench{0}'.format(index) for index in range(num_vault_ids)]
+
+
+def password_file(dest, vault_id):
+    return os.path.join(dest, 'vault_pass_{0}.txt'.format(vault_id))
+
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.dest):
+        os.makedirs(args.dest)
+    ids = vault_ids(max(args.num_vault_ids, 1))
+    vaults = []
+    for vault_id in ids:
+        password = 'secret-{0}'.format(vault_id)
+        with open(password_file(args.dest, vault_id), 'w') as f:
+            f.write(password + '\n')
+        vaults.append((vault_id, VaultLib([(vault_id, VaultSecret(password.encode('utf-8')))])))
+
+    names = ['vault_var_{0:05d}'.format(index) for index in range(args.num_vars)]
+    with open(os.path.join(args.dest, 'vault_vars.yml'), 'w') as f:
+        for index, name in enumerate(names):
+            vault_id, vault = vaults[index % len(vaults)]
+            plaintext = '{0}-{1}'.format(name, 'x' * args.value_length)[:args.value_length]
+            vaulttext = vault.encrypt(plaintext, vault_id=vault_id).decode('ascii')
+            f.write('{0}: !vault |\n  {1}\n'.format(name, vaulttext.replace('\n', '\n  ')))
+
+    with open(os.path.join(args.dest, 'vault_benchmark.yml'), 'w') as f:
+        f.write(PLAYBOOK.format(
+            vault_ids=' '.join('--vault-id {0}@{1}'.format(vault_id, os.path.basename(password_file(args.dest, vault_id)))
+                               for vault_id in ids),
+            filter_plugins=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'filter_plugins'),
+            direct=', '.join(names), memo=', '.join(name + ' | vault_memo' for name in names)))
+    print('{0} vaulted vars over {1} vault ids written to {2}'.format(len(names), len(ids), args.dest))
+
+
+if __name__ == '__main__':
+    main()
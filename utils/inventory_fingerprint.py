@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Skip re-importing a dynamic inventory script whose content has not changed.
+
+The script is run with --fingerprint, which prints a hash of its inventory that
+leaves out volatile hostvars (like current_time) together with those hostvars.
+If the hash matches the one saved next to the last snapshot the source is
+reported unchanged without reading the snapshot, otherwise the inventory is
+imported again with ansible-inventory --list and a new snapshot is saved. Only
+--list reads an unchanged snapshot:
+
+    python utils/inventory_fingerprint.py inventories/dyn_inventory_test_env.py
+    python utils/inventory_fingerprint.py inventories/dyn_inventory.py --list
+    DYN_INVENTORY_NUM_HOSTS=10000 python utils/inventory_fingerprint.py inventories/dyn_inventory.py --benchmark 5
+"""
+from argparse import ArgumentParser
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('source', help='Dynamic inventory script that supports --fingerprint')
+    parser.add_argument('--snapshot-dir', default=os.environ.get('INVENTORY_SNAPSHOT_DIR', '.inventory_snapshots'),
+                        help='Where the last fingerprint and import of each source are kept')
+    parser.add_argument('--force', action='store_true', help='Import the source even if it is unchanged')
+    parser.add_argument('--list', dest='list_inventory', action='store_true',
+                        help='Print the imported inventory, with current volatile hostvars, as JSON')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Time N fingerprint checks against N full re-imports instead')
+    parser.add_argument('--ansible-inventory', default='ansible-inventory', help='ansible-inventory executable')
+    return parser.parse_args()
+
+
+def snapshot_paths(snapshot_dir, source):
+    ''' the imported inventory, and the small file with its fingerprint '''
+    key = hashlib.sha256(os.path.abspath(source).encode('utf-8')).hexdigest()[:16]
+    base = os.path.join(snapshot_dir, '{0}-{1}'.format(os.path.basename(source), key))
+    return base + '.json', base + '.fingerprint'
+
+
+def read_fingerprint(source):
+    output = subprocess.check_output([os.path.abspath(source), '--fingerprint'], stdin=subprocess.DEVNULL)
+    return json.loads(output)
+
+
+def import_inventory(source, ansible_inventory):
+    """The full path: let ansible parse the whole source and dump it back."""
+    # fail instead of snapshotting the implicit localhost when the source cannot be parsed
+    env = dict(os.environ, ANSIBLE_INVENTORY_UNPARSED_FAILED='1')
+    output = subprocess.check_output([ansible_inventory, '-i', source, '--list'], stdin=subprocess.DEVNULL, env=env)
+    return json.loads(output)
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def save_json(path, data):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f, sort_keys=True)
+    os.rename(path + '.tmp', path)
+
+
+def refresh(source, snapshot_dir, ansible_inventory, force=False):
+    """Return (changed, current fingerprint), importing the source only if its fingerprint moved."""
+    inventory_path, fingerprint_path = snapshot_paths(snapshot_dir, source)
+    current = read_fingerprint(source)
+    saved = load_json(fingerprint_path)
+    if not force and saved and saved['fingerprint'] == current['fingerprint'] and os.path.exists(inventory_path):
+        return False, current
+    save_json(inventory_path, import_inventory(source, ansible_inventory))
+    # written last, so it never vouches for an inventory that was not saved
+    save_json(fingerprint_path, current)
+    return True, current
+
+
+def with_volatile(inventory, volatile):
+    hostvars = inventory.setdefault('_meta', {}).setdefault('hostvars', {})
+    for host, variables in volatile.items():
+        hostvars.setdefault(host, {}).update(variables)
+    return inventory
+
+
+def benchmark(args):
+    refresh(args.source, args.snapshot_dir, args.ansible_inventory)
+    timings = {}
+    for name, force in (('fingerprint check', False), ('full re-import', True)):
+        start = time.time()
+        for _ in range(args.benchmark):
+            refresh(args.source, args.snapshot_dir, args.ansible_inventory, force=force)
+        timings[name] = (time.time() - start) / args.benchmark
+        print('{0:<20} {1:>9.3f}s per run'.format(name, timings[name]))
+    print('fingerprint check is {0:.1f}x faster'.format(timings['full re-import'] / timings['fingerprint check']))
+
+
+def main():
+    args = parse_args()
+    if args.benchmark:
+        benchmark(args)
+        return
+    changed, current = refresh(args.source, args.snapshot_dir, args.ansible_inventory, force=args.force)
+    if args.list_inventory:
+        inventory = load_json(snapshot_paths(args.snapshot_dir, args.source)[0])
+        json.dump(with_volatile(inventory, current['volatile']), sys.stdout, sort_keys=True, indent=2)
+        print()
+    else:
+        print('{0} {1} {2}'.format(args.source, 'changed' if changed else 'unchanged', current['fingerprint']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""Run the load-shaped playbooks over a matrix of forks, strategies and host counts.
+
+Every run goes against a generated inventory of local-connection hosts. Wall time,
+per-task latency and peak RSS of the ansible-playbook process tree are written as
+one JSON file per run, and optionally compared against a saved baseline. Per-task
+latencies come from callback_plugins/task_timing.py, or from the time between task
+headers in the output if that callback cannot be loaded. Playbooks that hard-code
+their strategy, like free_waiter.yml, run with it alone instead of every --strategies:
+
+    python utils/run_benchmarks.py --forks 5,50 --hosts 10,100 --save-baseline baseline.json
+    python utils/run_benchmarks.py --forks 5,50 --hosts 10,100 --baseline baseline.json --threshold 0.1
+"""
+from argparse import ArgumentParser
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLAYBOOKS = ['file_benchmark.yml', 'setfact_50.yml', 'debug-50.yml', 'chatty_tasks.yml', 'ping-20.yml',
+             'free_waiter.yml']
+# playbooks that set their own strategy, or cannot run under the free one because they pause,
+# run once with it instead of over --strategies
+PLAYBOOK_STRATEGIES = {'free_waiter.yml': 'free', 'debug-50.yml': 'linear'}
+TASK_HEADER = re.compile(r'^(?:TASK|RUNNING HANDLER) \[(.*)\]')
+
+
+def csv(type_):
+    return lambda value: [type_(item) for item in value.split(',') if item]
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--playbooks', type=csv(str), default=PLAYBOOKS,
+                        help='Comma separated playbooks, relative to the repository (default: all of them)')
+    parser.add_argument('--forks', type=csv(int), default=[5], help='Comma separated fork counts (default: 5)')
+    parser.add_argument('--strategies', type=csv(str), default=['linear', 'free'],
+                        help='Comma separated strategies (default: linear,free)')
+    parser.add_argument('--hosts', type=csv(int), default=[10], help='Comma separated host counts (default: 10)')
+    parser.add_argument('--results-dir', default='bench_results', help='Where to write one JSON file per run')
+    parser.add_argument('--baseline', help='Compare wall times against this saved baseline')
+    parser.add_argument('--save-baseline', help='Save the results of this matrix as a baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative wall time increase reported as a regression (default: 0.1)')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='ansible-playbook executable')
+    parser.add_argument('-e', '--extra-vars', action='append', default=[], help='Passed on to ansible-playbook')
+    return parser.parse_args()
+
+
+def write_inventory(directory, num_hosts):
+    path = os.path.join(directory, 'hosts_{0}.ini'.format(num_hosts))
+    with open(path, 'w') as f:
+        f.write('[bench]\n')
+        f.writelines('bench-host-{0:05d}\n'.format(index) for index in range(num_hosts))
+        f.write('\n[bench:vars]\nansible_connection=local\n'
+                'ansible_python_interpreter="{{ ansible_playbook_python }}"\n')
+    return path
+
+
+def run_key(playbook, forks, strategy, num_hosts):
+    return '{0}-f{1}-{2}-h{3}'.format(os.path.splitext(os.path.basename(playbook))[0], forks, strategy, num_hosts)
+
+
+def run_playbook(args, playbook, inventory, forks, strategy):
+    """Run one playbook and collect its wall time, per-task timings and resource usage."""
+    timing_path = os.path.join(os.path.dirname(inventory), 'task_timing.json')
+    if os.path.exists(timing_path):
+        os.remove(timing_path)
+    callbacks = [name for name in os.environ.get('ANSIBLE_CALLBACKS_ENABLED', '').split(',') if name]
+    env = dict(os.environ, ANSIBLE_FORKS=str(forks), ANSIBLE_STRATEGY=strategy, ANSIBLE_NOCOLOR='1',
+               ANSIBLE_STDOUT_CALLBACK='default', ANSIBLE_CALLBACKS_ENABLED=','.join(callbacks + ['task_timing']),
+               ANSIBLE_TASK_TIMING_OUTPUT=timing_path)
+    command = [args.ansible_playbook, '-i', inventory, os.path.join(REPO, playbook)]
+    for extra_vars in args.extra_vars:
+        command.extend(['-e', extra_vars])
+
+    tasks = []
+    current = None
+    start = time.time()
+    proc = subprocess.Popen(command, cwd=REPO, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, universal_newlines=True)
+    for line in proc.stdout:
+        now = time.time()
+        match = TASK_HEADER.match(line)
+        if current and (match or line.startswith('PLAY')):
+            current['seconds'] = now - current['start']
+            tasks.append(current)
+            current = None
+        if match:
+            current = {'name': match.group(1), 'start': now}
+    proc.stdout.close()
+    # wait4 instead of proc.wait() to get the resource usage of this run's process tree alone
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall_time = time.time() - start
+    if current:
+        current['seconds'] = time.time() - current['start']
+        tasks.append(current)
+
+    result = {'wall_time': wall_time, 'rc': proc.returncode, 'peak_rss_kb': usage.ru_maxrss,
+              'cpu_time': usage.ru_utime + usage.ru_stime,
+              'tasks': [{'name': task['name'], 'seconds': round(task['seconds'], 6)} for task in tasks]}
+    if os.path.exists(timing_path):
+        with open(timing_path) as f:
+            timing = json.load(f)
+        result.update(fork_idle_time=timing['fork_idle_time'], critical_path=timing['critical_path'],
+                      tasks=[{'name': task['task'], 'seconds': task['max'], 'p50': task['p50'], 'p95': task['p95'],
+                              'p99': task['p99']} for task in timing['tasks']])
+    return result
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            print('{0:<50} {1:>9.2f}s  (no baseline)'.format(key, result['wall_time']))
+            continue
+        change = (result['wall_time'] - base['wall_time']) / base['wall_time']
+        flag = ' REGRESSION' if change > threshold else ''
+        print('{0:<50} {1:>9.2f}s  baseline {2:>9.2f}s  {3:+7.1%}{4}'.format(
+            key, result['wall_time'], base['wall_time'], change, flag))
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.results_dir):
+        os.makedirs(args.results_dir)
+
+    results = {}
+    inventory_dir = tempfile.mkdtemp(prefix='bench_inventory_')
+    for playbook, forks, strategy, num_hosts in itertools.product(args.playbooks, args.forks, args.strategies,
+                                                                  args.hosts):
+        if playbook in PLAYBOOK_STRATEGIES:
+            strategy = PLAYBOOK_STRATEGIES[playbook]
+        key = run_key(playbook, forks, strategy, num_hosts)
+        if key in results:
+            continue
+        result = run_playbook(args, playbook, write_inventory(inventory_dir, num_hosts), forks, strategy)
+        result.update(playbook=playbook, forks=forks, strategy=strategy, hosts=num_hosts, timestamp=time.time())
+        results[key] = result
+        with open(os.path.join(args.results_dir, key + '.json'), 'w') as f:
+            json.dump(result, f, indent=2)
+        print('{0}: {1:.2f}s, rc={2}, peak RSS {3} kB'.format(key, result['wall_time'], result['rc'],
+                                                               result['peak_rss_kb']))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('{0} regression(s) above {1:.0%}: {2}'.format(len(regressions), args.threshold,
+                                                               ', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Time vars loading of a generated vars tree, cold and warm.
+
+Runs ansible-inventory --list over a tree from utils/gen_vars_tree.py with the
+stock host_group_vars plugin, then with vars_plugins/indexed_vars.py against an
+empty index (cold), a complete one (warm) and one where --touch files changed:
+
+    python utils/gen_vars_tree.py /tmp/vars_tree --num-hosts 20000
+    python utils/vars_benchmark.py /tmp/vars_tree --touch 100
+
+The hostvars of every indexed run are checked against the host_group_vars run.
+The cold run builds the index, and is expected to be a little slower than
+host_group_vars, which does not stat the whole tree or write anything.
+"""
+from argparse import ArgumentParser
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+VARS_PLUGINS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'vars_plugins')
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('tree', help='Directory written by utils/gen_vars_tree.py')
+    parser.add_argument('--touch', type=int, default=100, help='Vars files changed before the last run (default: 100)')
+    parser.add_argument('--ansible-inventory', default='ansible-inventory', help='ansible-inventory executable')
+    return parser.parse_args()
+
+
+def list_inventory(args, vars_plugin, index_dir):
+    env = dict(os.environ, ANSIBLE_VARS_ENABLED=vars_plugin, ANSIBLE_VARS_PLUGINS=VARS_PLUGINS,
+               ANSIBLE_INDEXED_VARS_INDEX_DIR=index_dir)
+    start = time.time()
+    output = subprocess.check_output([args.ansible_inventory, '-i', os.path.join(args.tree, 'inventory.ini'),
+                                      '--list'], env=env, stdin=subprocess.DEVNULL)
+    return time.time() - start, json.loads(output)['_meta']['hostvars']
+
+
+def touch_files(tree, count):
+    """Append a variable to the first count host vars files, changing their size and mtime."""
+    touched = []
+    host_vars = os.path.join(tree, 'host_vars')
+    for name in sorted(os.listdir(host_vars)):
+        path = os.path.join(host_vars, name)
+        if len(touched) == count or not os.path.isfile(path):
+            continue
+        with open(path, 'a') as f:
+            f.write('touched_at: {0}\n'.format(time.time()))
+        touched.append(path)
+    return touched
+
+
+def main():
+    args = parse_args()
+    index_dir = tempfile.mkdtemp(prefix='indexed_vars_')
+    try:
+        runs = [('host_group_vars', 'host_group_vars'), ('indexed_vars cold', 'indexed_vars'),
+                ('indexed_vars warm', 'indexed_vars'), ('indexed_vars {0} changed'.format(args.touch), 'indexed_vars')]
+        expected = None
+        stock = None
+        for name, plugin in runs:
+            if name == runs[-1][0]:
+                touch_files(args.tree, args.touch)
+                expected = list_inventory(args, 'host_group_vars', index_dir)[1]
+            elapsed, hostvars = list_inventory(args, plugin, index_dir)
+            if expected is None:
+                expected, stock = hostvars, elapsed
+            note = '' if plugin == 'host_group_vars' else '  {0:+.0%} vs host_group_vars'.format(elapsed / stock - 1)
+            if name == 'indexed_vars cold':
+                note += ', builds the index'
+            print('{0:<28} {1:>8.2f}s{2}{3}'.format(name, elapsed, note,
+                                                   '' if hostvars == expected else '  HOSTVARS DIFFER'))
+    finally:
+        shutil.rmtree(index_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Time inline vault decryption per reference, with and without vault_memo.
+
+Loads vault_vars.yml from a directory written by utils/gen_vault_playbook.py and
+references every var --references times, first the way templating does (one
+decrypt per reference), then through filter_plugins/vault_memo.py. With
+--playbook, vault_benchmark.yml is also run end to end with both tags:
+
+    python utils/gen_vault_playbook.py /tmp/vault_bench --num-vars 1000 --num-vault-ids 4
+    python utils/vault_benchmark.py /tmp/vault_bench --references 10 --playbook
+"""
+from argparse import ArgumentParser
+import glob
+import importlib.util
+import os
+import subprocess
+import time
+
+from ansible.parsing.dataloader import DataLoader
+from ansible.parsing.vault import VaultSecret
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('dir', help='Directory written by utils/gen_vault_playbook.py')
+    parser.add_argument('--references', type=int, default=10, help='References to each var (default: 10)')
+    parser.add_argument('--playbook', action='store_true', help='Also time vault_benchmark.yml with both tags')
+    parser.add_argument('--ansible-playbook', default='ansible-playbook', help='ansible-playbook executable')
+    return parser.parse_args()
+
+
+def read_secrets(directory):
+    secrets = []
+    for path in sorted(glob.glob(os.path.join(directory, 'vault_pass_*.txt'))):
+        vault_id = os.path.basename(path)[len('vault_pass_'):-len('.txt')]
+        with open(path, 'rb') as f:
+            secrets.append((vault_id, VaultSecret(f.read().strip())))
+    return secrets
+
+
+def load_filter():
+    spec = importlib.util.spec_from_file_location('vault_memo', os.path.join(REPO, 'filter_plugins', 'vault_memo.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_references(values, references, resolve):
+    start = time.time()
+    for _ in range(references):
+        for value in values:
+            resolve(value)
+    return time.time() - start
+
+
+def run_playbook(args, tag):
+    command = [args.ansible_playbook, '-i', 'localhost,', '-c', 'local', 'vault_benchmark.yml', '-t', tag,
+               '-e', 'references={0}'.format(args.references)]
+    for vault_id, _ in read_secrets(args.dir):
+        command.extend(['--vault-id', '{0}@vault_pass_{0}.txt'.format(vault_id)])
+    env = dict(os.environ, ANSIBLE_FILTER_PLUGINS=os.path.join(REPO, 'filter_plugins'))
+    start = time.time()
+    subprocess.check_call(command, cwd=args.dir, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+    return time.time() - start
+
+
+def main():
+    args = parse_args()
+    loader = DataLoader()
+    loader.set_vault_secrets(read_secrets(args.dir))
+    values = list(loader.load_from_file(os.path.join(args.dir, 'vault_vars.yml')).values())
+    vault_memo = load_filter()
+    count = len(values) * args.references
+
+    direct = time_references(values, args.references, lambda value: value.data)
+    cold = time_references(values, 1, vault_memo.vault_memo)
+    warm = time_references(values, args.references, vault_memo.vault_memo)
+    print('{0} vars, {1} references'.format(len(values), count))
+    print('{0:<24} {1:>10.3f}ms per reference'.format('decrypt every reference', direct / count * 1000))
+    print('{0:<24} {1:>10.3f}ms per var'.format('vault_memo first decrypt', cold / len(values) * 1000))
+    print('{0:<24} {1:>10.3f}ms per reference'.format('vault_memo memoized', warm / count * 1000))
+
+    if args.playbook:
+        for tag in ('direct', 'memo'):
+            print('{0:<24} {1:>10.2f}s'.format('playbook -t ' + tag, run_playbook(args, tag)))
+
+
+if __name__ == '__main__':
+    main()
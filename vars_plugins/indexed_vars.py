@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    vars: indexed_vars
+    version_added: "2.10"
+    short_description: host_vars and group_vars from a persistent index of the vars tree
+    requirements:
+        - enable in configuration, usually in place of host_group_vars, e.g. ANSIBLE_VARS_ENABLED=indexed_vars
+    description:
+        - Loads the same files as host_group_vars, with the same precedence, but parses each file once
+          and keeps the result in an index on disk keyed by the file's path, mtime and size.
+        - The first lookup in a process walks the group_vars and host_vars tree, without parsing it.
+          A file is parsed the first time a host or group it belongs to is looked up, unless the index
+          holds it with the same mtime and size. The index is written once, when the process exits.
+        - Vault encrypted files and files with !unsafe or inline !vault values are never written to
+          the index, they are parsed again by every run and kept in memory only.
+        - Values read back from the index get the mapping, sequence and string types of the YAML loader,
+          so they template like the ones host_group_vars returns, but they carry no file and line
+          position for error messages.
+        - Building the index, on the first run or after it was removed, is a little slower than
+          host_group_vars, which does not stat the whole tree or write anything.
+    options:
+      index_dir:
+        description: Directory that holds one index per inventory or playbook directory.
+        default: ~/.ansible/indexed_vars
+        type: path
+        env:
+          - name: ANSIBLE_INDEXED_VARS_INDEX_DIR
+        ini:
+          - key: index_dir
+            section: vars_indexed_vars
+      stage:
+        ini:
+          - key: stage
+            section: vars_indexed_vars
+        env:
+          - name: ANSIBLE_VARS_PLUGIN_STAGE
+      _valid_extensions:
+        default: [".yml", ".yaml", ".json"]
+        description:
+          - "Check all of these extensions when looking for 'variable' files which should be YAML or JSON or vaulted versions of these."
+        env:
+          - name: ANSIBLE_YAML_FILENAME_EXT
+        ini:
+          - key: yaml_valid_extensions
+            section: defaults
+        type: list
+        elements: string
+    extends_documentation_fragment:
+      - vars_plugin_staging
+'''
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+
+from ansible.errors import AnsibleParserError
+from ansible.inventory.group import Group
+from ansible.inventory.host import Host
+from ansible.module_utils._text import to_native
+from ansible.module_utils.six import string_types
+from ansible.parsing.vault import is_encrypted_file
+from ansible.parsing.yaml.objects import AnsibleMapping, AnsibleSequence, AnsibleUnicode
+from ansible.plugins.vars import BaseVarsPlugin
+from ansible.utils.unsafe_proxy import AnsibleUnsafe
+from ansible.utils.vars import combine_vars
+
+INDEX_VERSION = 1
+SUBDIRS = ('group_vars', 'host_vars')
+INDEXES = {}  # realpath of a basedir -> VarsIndex, for the life of the process
+NOT_PARSED = object()
+
+
+def persistable(data):
+    ''' whether data survives a round trip through JSON unchanged '''
+    if isinstance(data, AnsibleUnsafe):
+        return False
+    if data is None or isinstance(data, (bool, int, float) + string_types):
+        return True
+    if isinstance(data, dict):
+        return all(isinstance(k, string_types) and persistable(v) for k, v in data.items())
+    if isinstance(data, list):
+        return all(persistable(v) for v in data)
+    return False
+
+
+def restore(data):
+    ''' data read back from the index, with the types the YAML loader gives '''
+    if isinstance(data, dict):
+        return AnsibleMapping((AnsibleUnicode(k), restore(v)) for k, v in data.items())
+    if isinstance(data, list):
+        return AnsibleSequence(restore(v) for v in data)
+    if isinstance(data, string_types):
+        return AnsibleUnicode(data)
+    return data
+
+
+class VarsIndex(object):
+    ''' parsed vars files of one basedir, and which files belong to which entity '''
+
+    def __init__(self, basedir, index_path, extensions):
+        self.basedir = basedir
+        self.index_path = index_path
+        self.extensions = extensions
+        self.files = {}  # relative path -> [mtime_ns, size, data or NOT_PARSED, persist, read from the index]
+        self.entries = dict((subdir, {}) for subdir in SUBDIRS)  # top level name -> relative paths of its files
+        self.parsed = 0
+        self.dirty = False  # whether the index on disk is out of date
+        self.pid = os.getpid()  # forks inherit the atexit hook, only this process writes
+
+    def _read(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION or index.get('extensions') != self.extensions:
+            return {}
+        return index['files']
+
+    def write(self):
+        if not self.dirty or os.getpid() != self.pid:
+            return
+        self.dirty = False
+        files = dict((path, entry[:3]) for path, entry in self.files.items() if entry[3])
+        directory = os.path.dirname(self.index_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.indexed_vars')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'extensions': self.extensions, 'files': files}, f,
+                      separators=(',', ':'))
+        os.rename(tmp, self.index_path)
+
+    def _walk(self, path, top=False):
+        ''' stat the vars files under path in load order, following DataLoader.find_vars_files '''
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name.endswith('~'):
+                continue
+            # at the top level any name can be a host or group name, find() picks the ones looked up
+            ext = os.path.splitext(entry.name)[1]
+            if entry.is_dir():
+                if top or not ext:
+                    for found in self._walk(entry.path):
+                        yield found
+            elif entry.is_file() and (top or not ext or ext in self.extensions):
+                stat = entry.stat()
+                yield os.path.relpath(entry.path, self.basedir), stat.st_mtime_ns, stat.st_size
+
+    def _parse(self, loader, relpath):
+        path = os.path.join(self.basedir, relpath)
+        with open(path, 'rb') as f:
+            encrypted = is_encrypted_file(f)
+        data = loader.load_from_file(path, cache=False, unsafe=True)
+        self.parsed += 1
+        return data, not encrypted and persistable(data)
+
+    def refresh(self):
+        ''' walk the tree and keep what the index on disk holds for unchanged files, without parsing '''
+        known = self._read()
+        for subdir in SUBDIRS:
+            for relpath, mtime, size in self._walk(os.path.join(self.basedir, subdir), top=True):
+                name = relpath[len(subdir) + 1:].split(os.path.sep, 1)[0]
+                self.entries[subdir].setdefault(name, []).append(relpath)
+                entry = known.pop(relpath, None)
+                if entry and entry[0] == mtime and entry[1] == size:
+                    self.files[relpath] = [mtime, size, entry[2], True, True]
+                else:
+                    self.files[relpath] = [mtime, size, NOT_PARSED, False, False]
+                    self.dirty = self.dirty or entry is not None
+        # files that are gone
+        self.dirty = self.dirty or bool(known)
+
+    def find(self, subdir, name):
+        ''' relative paths of the vars files for name, in load order '''
+        entries = self.entries[subdir]
+        for ext in [''] + self.extensions:
+            candidate = name + ext if '.' in ext or not ext else '.'.join([name, ext])
+            if candidate in entries:
+                return entries[candidate]
+        return []
+
+    def get(self, loader, relpath, cache=True):
+        entry = self.files[relpath]
+        if entry[4]:
+            entry[2:] = [restore(entry[2]), True, False]
+        if entry[2] is NOT_PARSED:
+            data, persist = self._parse(loader, relpath)
+            entry[2:] = [data, persist, False]
+            self.dirty = self.dirty or persist
+        elif not cache:
+            try:
+                stat = os.stat(os.path.join(self.basedir, relpath))
+            except OSError:
+                return None
+            if (stat.st_mtime_ns, stat.st_size) != (entry[0], entry[1]):
+                data, persist = self._parse(loader, relpath)
+                entry[:] = [stat.st_mtime_ns, stat.st_size, data, persist, False]
+                self.dirty = True
+        return entry[2]
+
+
+class VarsModule(BaseVarsPlugin):
+
+    REQUIRES_ENABLED = True
+
+    def _index(self, loader):
+        basedir = os.path.realpath(self._basedir)
+        index = INDEXES.get(basedir)
+        if index is None:
+            key = hashlib.sha1(basedir.encode('utf-8')).hexdigest()
+            index_path = os.path.join(os.path.expanduser(self.get_option('index_dir')), key + '.json')
+            index = INDEXES[basedir] = VarsIndex(basedir, index_path, list(self.get_option('_valid_extensions')))
+            index.refresh()
+            atexit.register(index.write)
+            self._display.vvv('indexed_vars: %d files under %s, %d indexed'
+                              % (len(index.files), basedir, sum(1 for entry in index.files.values() if entry[3])))
+        return index
+
+    def get_vars(self, loader, path, entities, cache=True):
+        ''' answers host_vars and group_vars lookups from the index '''
+
+        if not isinstance(entities, list):
+            entities = [entities]
+
+        super(VarsModule, self).get_vars(loader, path, entities)
+
+        data = {}
+        try:
+            index = self._index(loader)
+            for entity in entities:
+                if isinstance(entity, Host):
+                    subdir = 'host_vars'
+                elif isinstance(entity, Group):
+                    subdir = 'group_vars'
+                else:
+                    raise AnsibleParserError("Supplied entity must be Host or Group, got %s instead" % (type(entity)))
+
+                # avoid 'chroot' type inventory hostnames /path/to/chroot
+                if entity.name.startswith(os.path.sep):
+                    continue
+                for relpath in index.find(subdir, entity.name):
+                    new_data = index.get(loader, relpath, cache=cache)
+                    if new_data:  # ignore empty files
+                        data = combine_vars(data, new_data)
+        except AnsibleParserError:
+            raise
+        except Exception as e:
+            raise AnsibleParserError(to_native(e))
+        return data